@@ -0,0 +1,42 @@
+-- Notifications about changes of the tables synced by ETL pipelines (`NE_ETL_LISTEN_NOTIFY=1`).
+--
+-- Every statement that changes a table sends a notification to the channel named after the table, e.g.
+-- `content.film_work`. Triggers are statement-level and Postgres folds identical notifications of a transaction,
+-- so bulk updates produce a single notification per table.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION content.notify_etl_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify(TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME, '');
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS etl_change_notification ON content.film_work;
+CREATE TRIGGER etl_change_notification
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON content.film_work
+    FOR EACH STATEMENT EXECUTE FUNCTION content.notify_etl_change();
+
+DROP TRIGGER IF EXISTS etl_change_notification ON content.genre;
+CREATE TRIGGER etl_change_notification
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON content.genre
+    FOR EACH STATEMENT EXECUTE FUNCTION content.notify_etl_change();
+
+DROP TRIGGER IF EXISTS etl_change_notification ON content.person;
+CREATE TRIGGER etl_change_notification
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON content.person
+    FOR EACH STATEMENT EXECUTE FUNCTION content.notify_etl_change();
+
+DROP TRIGGER IF EXISTS etl_change_notification ON content.genre_film_work;
+CREATE TRIGGER etl_change_notification
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON content.genre_film_work
+    FOR EACH STATEMENT EXECUTE FUNCTION content.notify_etl_change();
+
+DROP TRIGGER IF EXISTS etl_change_notification ON content.person_film_work;
+CREATE TRIGGER etl_change_notification
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON content.person_film_work
+    FOR EACH STATEMENT EXECUTE FUNCTION content.notify_etl_change();
+
+COMMIT;
@@ -0,0 +1,81 @@
+-- Changelog of the entities synced by ETL pipelines (`NE_ETL_CHANGELOG=1`).
+--
+-- Triggers append a record per changed row: entity type, entity ID and operation (`I`nsert, `U`pdate, `D`elete).
+-- Changes of link tables are recorded as updates of the linked entities. Pipelines read records in the `(txid, seq)`
+-- order and only from committed transactions: `seq` alone is not enough, since a transaction may commit after
+-- records with greater `seq` have already been read.
+--
+-- Records are never deleted by ETL pipelines, prune the old ones periodically, e.g.:
+-- DELETE FROM content.etl_changelog WHERE created < now() - interval '7 days';
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS content.etl_changelog (
+    seq bigserial PRIMARY KEY,
+    txid bigint NOT NULL DEFAULT txid_current(),
+    entity_type text NOT NULL,
+    entity_id uuid NOT NULL,
+    op char(1) NOT NULL,
+    created timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS etl_changelog_txid_seq_idx ON content.etl_changelog (txid, seq);
+
+-- Entities: film_work, genre, person
+CREATE OR REPLACE FUNCTION content.log_etl_entity_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO content.etl_changelog (entity_type, entity_id, op) VALUES (TG_TABLE_NAME, OLD.id, 'D');
+    ELSE
+        INSERT INTO content.etl_changelog (entity_type, entity_id, op) VALUES (TG_TABLE_NAME, NEW.id, left(TG_OP, 1));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Links: genre_film_work, person_film_work. Trigger arguments are the columns with IDs of the linked entities and
+-- their entity types, e.g. `('film_work_id', 'film_work', 'person_id', 'person')`
+CREATE OR REPLACE FUNCTION content.log_etl_link_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    link jsonb;
+    i integer;
+BEGIN
+    FOREACH link IN ARRAY ARRAY[to_jsonb(OLD), to_jsonb(NEW)] LOOP
+        CONTINUE WHEN link IS NULL;
+        FOR i IN 0..TG_NARGS - 1 BY 2 LOOP
+            INSERT INTO content.etl_changelog (entity_type, entity_id, op)
+            VALUES (TG_ARGV[i + 1], (link ->> TG_ARGV[i])::uuid, 'U');
+        END LOOP;
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS etl_changelog ON content.film_work;
+CREATE TRIGGER etl_changelog
+    AFTER INSERT OR UPDATE OR DELETE ON content.film_work
+    FOR EACH ROW EXECUTE FUNCTION content.log_etl_entity_change();
+
+DROP TRIGGER IF EXISTS etl_changelog ON content.genre;
+CREATE TRIGGER etl_changelog
+    AFTER INSERT OR UPDATE OR DELETE ON content.genre
+    FOR EACH ROW EXECUTE FUNCTION content.log_etl_entity_change();
+
+DROP TRIGGER IF EXISTS etl_changelog ON content.person;
+CREATE TRIGGER etl_changelog
+    AFTER INSERT OR UPDATE OR DELETE ON content.person
+    FOR EACH ROW EXECUTE FUNCTION content.log_etl_entity_change();
+
+DROP TRIGGER IF EXISTS etl_changelog ON content.genre_film_work;
+CREATE TRIGGER etl_changelog
+    AFTER INSERT OR UPDATE OR DELETE ON content.genre_film_work
+    FOR EACH ROW EXECUTE FUNCTION content.log_etl_link_change('film_work_id', 'film_work');
+
+DROP TRIGGER IF EXISTS etl_changelog ON content.person_film_work;
+CREATE TRIGGER etl_changelog
+    AFTER INSERT OR UPDATE OR DELETE ON content.person_film_work
+    FOR EACH ROW EXECUTE FUNCTION content.log_etl_link_change('film_work_id', 'film_work', 'person_id', 'person');
+
+COMMIT;
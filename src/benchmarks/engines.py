@@ -0,0 +1,57 @@
+"""Benchmark of the thread-based and asyncio ETL engines.
+
+Runs a full load of all indices with each engine against the configured Postgres, Elasticsearch and Redis (use a
+development stack: checkpoints and document digests are reset before every run).
+
+Usage: `python -m benchmarks.engines [--repeat 3]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import TYPE_CHECKING
+
+from etl.config.settings import get_settings
+from etl.containers import Container
+
+if TYPE_CHECKING:
+    from etl.domain.engines import Engine
+
+
+def reset_state(container: Container) -> None:
+    """Reset checkpoints and digests, so the next run loads all documents."""
+    storage = container.redis_storage()
+    for pipeline in container.pipelines_to_run():
+        storage.remove(pipeline.extractor.etl_checkpoint_key)
+        storage.remove(pipeline.extractor.etl_change_probe_key)
+        storage.remove(pipeline.loader.etl_hashes_key)
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    container = Container()
+    container.config.from_pydantic(settings=get_settings())
+    container.init_resources()
+    engines: dict[str, Engine] = {"threads": container.thread_engine(), "asyncio": container.async_engine()}
+    try:
+        for name, engine in engines.items():
+            for _ in range(args.repeat):
+                reset_state(container)
+                started_at = time.perf_counter()
+                reports = engine.run()
+                seconds = time.perf_counter() - started_at
+                documents = sum(report.documents for report in reports)
+                print(f"{name:<8} {documents:8d} documents {seconds:8.2f} s {documents / seconds:10.0f} docs/s")
+    finally:
+        for engine in engines.values():
+            engine.close()
+        container.shutdown_resources()
+
+
+if __name__ == "__main__":
+    main()
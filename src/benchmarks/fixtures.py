@@ -0,0 +1,102 @@
+"""Realistic Postgres rows of the ETL pipelines."""
+
+from __future__ import annotations
+
+import datetime
+import random
+import uuid
+from typing import Any
+
+import orjson
+
+from etl.constants import RAW_ROW_FIELD
+from etl.domain.filmworks.schemas import MovieDetail
+from etl.domain.persons.schemas import PersonFullDetail
+
+GENRES = ("Action", "Adventure", "Comedy", "Documentary", "Drama", "Fantasy", "Sci-Fi", "Thriller")
+WORDS = (
+    "star", "galaxy", "war", "empire", "return", "force", "фильм", "жизнь", "space", "trek", "dark", "phantom",
+    "menace", "clone", "attack", "revenge", "sith", "awakens", "last", "jedi", "rise", "skywalker",
+)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _persons(rng: random.Random, count: int) -> list[dict[str, Any]]:
+    return [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": _text(rng, 2)} for _ in range(count)]
+
+
+def _film(rng: random.Random) -> dict[str, Any]:
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": _text(rng, 3),
+        "imdb_rating": round(rng.uniform(1, 10), 1),
+        "age_rating": rng.choice(("0", "6", "12", "16", "18")),
+        "release_date": datetime.date(rng.randint(1950, 2023), rng.randint(1, 12), rng.randint(1, 28)).isoformat(),
+        "access_type": rng.choice(("public", "subscription")),
+    }
+
+
+def movie_row(rng: random.Random) -> dict[str, Any]:
+    """Row of the `FilmworkExtractor` data query."""
+    genres = [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name} for name in rng.sample(GENRES, 3)]
+    actors, writers, directors = _persons(rng, 8), _persons(rng, 2), _persons(rng, 1)
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128)),
+        "title": _text(rng, 3),
+        "imdb_rating": round(rng.uniform(1, 10), 1),
+        "description": _text(rng, 60),
+        "age_rating": rng.choice(("0", "6", "12", "16", "18")),
+        "release_date": datetime.date(rng.randint(1950, 2023), rng.randint(1, 12), rng.randint(1, 28)),
+        "access_type": rng.choice(("public", "subscription")),
+        "genres_names": [genre["name"] for genre in genres],
+        "actors_names": [person["name"] for person in actors],
+        "writers_names": [person["name"] for person in writers],
+        "directors_names": [person["name"] for person in directors],
+        "genre": genres,
+        "actors": actors,
+        "writers": writers,
+        "directors": directors,
+    }
+
+
+def person_row(rng: random.Random) -> dict[str, Any]:
+    """Row of the `PersonExtractor` data query."""
+    actor, writer, director = [_film(rng) for _ in range(12)], [_film(rng) for _ in range(2)], None
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128)),
+        "full_name": _text(rng, 2),
+        "films_ids": [uuid.UUID(film["id"]) for film in actor + writer],
+        "actor": actor,
+        "writer": writer,
+        "director": director,
+    }
+
+
+def movie_rows(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Rows of movies."""
+    rng = random.Random(seed)
+    return [movie_row(rng) for _ in range(count)]
+
+
+def person_rows(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Rows of persons."""
+    rng = random.Random(seed)
+    return [person_row(rng) for _ in range(count)]
+
+
+def raw_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Rows rendered as JSON text by Postgres, the way they are fetched for the transform pool workers."""
+    return [{"id": row["id"], RAW_ROW_FIELD: orjson.dumps(row).decode()} for row in rows]
+
+
+def movie_documents(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """`_source` of movie documents."""
+    return [MovieDetail.from_dict(row).to_dict() for row in movie_rows(count, seed)]
+
+
+def person_documents(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """`_source` of person documents."""
+    return [PersonFullDetail.from_dict(row).to_dict() for row in person_rows(count, seed)]
@@ -0,0 +1,51 @@
+"""Micro-benchmark of Elasticsearch serializers on bulk requests.
+
+Usage: `python -m benchmarks.serializers [--documents 5000] [--repeat 5]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import timeit
+from typing import TYPE_CHECKING, Any
+
+from elasticsearch import helpers
+from elasticsearch.serializer import JSONSerializer
+
+from benchmarks.fixtures import movie_documents, person_documents
+from etl.infrastructure.db.elastic import OrjsonSerializer
+
+if TYPE_CHECKING:
+    from elasticsearch.serializer import Serializer
+
+
+def serialize_bulk(serializer: Serializer, documents: list[dict[str, Any]]) -> int:
+    """Serialize documents as a bulk request body, return its length."""
+    size = 0
+    for document in documents:
+        action, source = helpers.expand_action({"_index": "index", "_id": str(document["uuid"]), "_source": document})
+        size += len(serializer.dumps(action)) + len(serializer.dumps(source)) + 2
+    return size
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    serializers: dict[str, Serializer] = {"json": JSONSerializer(), "orjson": OrjsonSerializer()}
+    datasets = {"movies": movie_documents(args.documents), "persons": person_documents(args.documents)}
+    for dataset, documents in datasets.items():
+        bodies = {name: serialize_bulk(serializer, documents) for name, serializer in serializers.items()}
+        print(f"{dataset}: {args.documents} documents, {bodies['json'] / args.documents:.0f} chars/doc")
+        for name, serializer in serializers.items():
+            timer = timeit.Timer(functools.partial(serialize_bulk, serializer, documents))
+            seconds = min(timer.repeat(number=1, repeat=args.repeat))
+            print(f"  {name:<8} {seconds * 1000:8.1f} ms {args.documents / seconds:10.0f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Benchmark of building documents `_source` from Postgres rows.
+
+Compares the dataclass round-trip (`from_dict(row).to_dict()`) with the direct `source_from_row` mapping, then
+measures throughput of transformers (with serialization) in process pools of the given sizes. Pools get rows rendered
+as JSON text, the way they are fetched with `NE_ETL_TRANSFORM_WORKERS`; without a pool (`0` workers) rows are decoded
+beforehand. The pool should be turned on only if it beats `0` workers on the target host.
+
+Usage: `python -m benchmarks.transformers [--documents 5000] [--repeat 5] [--workers 0 2 4 8 16]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import timeit
+import tracemalloc
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from benchmarks.fixtures import movie_rows, person_rows, raw_rows
+from etl.domain.filmworks import FilmworkTransformer, MovieDetail
+from etl.domain.persons import PersonFullDetail, PersonTransformer
+from etl.infrastructure.db.elastic import OrjsonSerializer, dumps_bytes
+from etl.infrastructure.workers import init_process_pool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from etl.domain.schemas import BasePgSchema
+    from etl.domain.transformers import ElasticTransformer
+
+
+TransformResultT = tuple[list[Any], list[dict[str, Any]]]
+
+
+def round_trip(schema_class: type[BasePgSchema], rows: list[dict]) -> TransformResultT:
+    """Build documents through schema objects, the whole batch is deserialized first.
+
+    Returns intermediate objects along with documents, so they are alive at the time of measurement.
+    """
+    entities = [schema_class.from_dict(row) for row in rows]
+    return entities, [entity.to_dict() for entity in entities]
+
+
+def direct(schema_class: type[BasePgSchema], rows: list[dict]) -> TransformResultT:
+    """Build documents straight from rows."""
+    return [], [schema_class.source_from_row(row) for row in rows]
+
+
+def allocations(transform: Callable[[], TransformResultT]) -> tuple[int, int]:
+    """Number of live memory blocks and peak memory (bytes) allocated by transforming a batch."""
+    tracemalloc.start()
+    try:
+        result = transform()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return sum(stat.count for stat in snapshot.statistics("filename")), peak
+
+
+def transform_batches(transformer: ElasticTransformer, rows: list[dict], batch_size: int) -> list[bytes]:
+    """Transform rows in batches and serialize documents the way the loader does, return the documents."""
+    serializer = OrjsonSerializer()
+    documents = []
+    batches = iter(rows)
+    while batch := list(islice(batches, batch_size)):
+        documents.extend(dumps_bytes(serializer, action["_source"]) for action in transformer.transform(batch))
+    return documents
+
+
+def compare_process_pools(datasets: dict[str, tuple[type[ElasticTransformer], list[dict]]], args: Any) -> None:
+    """Print throughput of transformers with process pools of different sizes, relative to the one without a pool."""
+    print(f"process pools ({os.cpu_count()} CPU(s)):")
+    baselines: dict[str, float] = {}
+    for workers in sorted(set(args.workers) | {0}):
+        pool_resource = init_process_pool(workers)
+        process_pool = next(pool_resource)
+        try:
+            for dataset, (transformer_class, rows) in datasets.items():
+                transformer = transformer_class(
+                    process_pool=process_pool, serializer=OrjsonSerializer(), workers=workers,
+                )
+                batch_rows = raw_rows(rows) if workers else rows
+                documents = transform_batches(transformer, batch_rows, args.batch_size)  # also warms up workers
+                if documents != transform_batches(transformer_class(), rows, args.batch_size):
+                    raise RuntimeError(f"Documents of `{dataset}` built by {workers} worker(s) differ")
+                run = functools.partial(transform_batches, transformer, batch_rows, args.batch_size)
+                throughput = len(rows) / min(timeit.Timer(run).repeat(number=1, repeat=args.repeat))
+                baseline = baselines.setdefault(dataset, throughput)
+                print(
+                    f"  {dataset:<8} {workers:3d} worker(s) {throughput:10.0f} docs/s"
+                    f" {throughput / baseline:6.2f}x of no pool",
+                )
+        finally:
+            next(pool_resource, None)
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="*", default=[0, 2, 4, 8])
+    args = parser.parse_args()
+
+    datasets: dict[str, tuple[type[BasePgSchema], list[dict]]] = {
+        "movies": (MovieDetail, movie_rows(args.documents)),
+        "persons": (PersonFullDetail, person_rows(args.documents)),
+    }
+    for dataset, (schema_class, rows) in datasets.items():
+        if round_trip(schema_class, rows)[1] != direct(schema_class, rows)[1]:
+            raise RuntimeError(f"Documents of `{dataset}` differ")
+        print(f"{dataset}: {args.documents} documents")
+        for name, transform in {"round-trip": round_trip, "direct": direct}.items():
+            run = functools.partial(transform, schema_class, rows)
+            seconds = min(timeit.Timer(run).repeat(number=1, repeat=args.repeat))
+            blocks, peak = allocations(run)
+            print(
+                f"  {name:<10} {args.documents / seconds:10.0f} docs/s"
+                f" {blocks / args.documents:8.1f} blocks/doc {peak / 1024 / 1024:8.1f} MiB peak",
+            )
+
+    compare_process_pools(
+        {
+            "movies": (FilmworkTransformer, datasets["movies"][1]),
+            "persons": (PersonTransformer, datasets["persons"][1]),
+        },
+        args,
+    )
+
+
+if __name__ == "__main__":
+    main()
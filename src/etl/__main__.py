@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import argparse
+import functools
 import logging
-from threading import Thread
+import signal
+import subprocess
+import sys
 from time import sleep
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from dependency_injector.wiring import Provide, inject
 
@@ -13,34 +17,141 @@ from .constants import ETL_REFRESH_TIME_SECONDS
 from .containers import Container
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Mapping
 
+    from etl.domain.backfill import Backfill
+    from etl.domain.engines import Engine
     from etl.domain.pipelines import ETLPipeline
+    from etl.domain.schedulers import PipelineScheduler
+    from etl.domain.watchers import ChangeWatcher
 
 settings = get_settings()
 
 
 @inject
-def main(pipelines_to_run: Sequence[ETLPipeline] = Provide[Container.pipelines_to_run]) -> None:
+def main(engine: Engine = Provide[Container.engine]) -> None:
     """Launch all ETL pipelines."""
     logging.info("Start ETL pipelines")
+    engine.run()
 
-    threads = []
-    for pipeline in pipelines_to_run:
-        process = Thread(target=pipeline.execute)
-        process.start()
-        threads.append(process)
 
-    for process in threads:
-        process.join()
+@inject
+def schedule(scheduler: PipelineScheduler = Provide[Container.pipeline_scheduler]) -> None:
+    """Launch every ETL pipeline on its own cadence."""
+    logging.info("Start ETL pipelines on schedule")
+    stop_on_sigterm(scheduler.stop)
+    scheduler.run()
+
+
+@inject
+def watch(
+    engine: Engine = Provide[Container.engine],
+    watcher: ChangeWatcher = Provide[Container.change_watcher],
+) -> None:
+    """Launch ETL pipelines whenever their source tables change."""
+    logging.info("Start ETL pipelines, listening to changes of the source tables")
+    stop_on_sigterm(watcher.stop)
+    watcher.watch(engine.source_tables)
+    engine.run()
+    while not watcher.stopped:
+        tables = watcher.wait()
+        if not watcher.stopped:
+            engine.run(tables)
+
+
+def stop_on_sigterm(stop: Callable[[], None]) -> None:
+    """Call `stop` on SIGTERM (e.g. `docker stop`), so current pipeline runs are finished before exit."""
+
+    def handle_sigterm(signum: int, frame: Any) -> None:
+        logging.info("Received SIGTERM, stop once current runs are finished")
+        stop()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+@inject
+def rebuild(
+    pipeline_name: str,
+    workers: int = 0,
+    pipelines: Mapping[str, ETLPipeline] = Provide[Container.pipelines_by_name],
+    backfill: Backfill = Provide[Container.index_backfill],
+) -> None:
+    """Rebuild index of the given ETL pipeline.
+
+    With `workers`, entities are loaded to the new index version by a pool of worker processes.
+    """
+    logging.info("Start index rebuild of the `%s` pipeline", pipeline_name)
+    if not workers:
+        pipelines[pipeline_name].rebuild()
+        return
+    start_worker = functools.partial(start_backfill_worker, pipeline_name)
+    rebuild_index = pipelines[pipeline_name].rebuild(
+        functools.partial(backfill.run, workers=workers, start_worker=start_worker),
+    )
+    backfill.clean(rebuild_index)
+
+
+def start_backfill_worker(pipeline_name: str, rebuild_index: str) -> subprocess.Popen:
+    """Start a backfill worker process."""
+    command = [sys.executable, "-m", "etl", "--backfill-worker", pipeline_name, rebuild_index]
+    return subprocess.Popen(command)
+
+
+@inject
+def backfill_worker(
+    pipeline_name: str,
+    rebuild_index: str,
+    pipelines: Mapping[str, ETLPipeline] = Provide[Container.pipelines_by_name],
+    backfill: Backfill = Provide[Container.index_backfill],
+) -> None:
+    """Load partitions of the index being rebuilt by the given ETL pipeline."""
+    backfill.work(pipelines[pipeline_name], rebuild_index)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="etl")
+    parser.add_argument(
+        "--rebuild",
+        choices=sorted(Container.pipelines_by_name.kwargs),
+        help="rebuild index of the given pipeline into a new index version and exit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="load entities to the rebuilt index with a pool of worker processes (range-partitioned backfill)",
+    )
+    parser.add_argument("--backfill-worker", nargs=2, metavar=("PIPELINE", "INDEX"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.workers and args.rebuild is None:
+        parser.error("argument --workers: requires --rebuild")
+    if args.workers < 0:
+        parser.error("argument --workers: must not be negative")
+
     container = Container()
     container.config.from_pydantic(settings=settings)
-    container.init_resources()
+    if args.backfill_worker is not None:
+        # Backfill workers are processes of their own: they transform batches in place and don't listen to changes,
+        # other resources are initialized once they are used
+        container.config.ETL_TRANSFORM_WORKERS.from_value(0)
+        container.logging.init()
+    else:
+        container.init_resources()
     container.check_dependencies()
 
-    while True:
-        main()
-        sleep(ETL_REFRESH_TIME_SECONDS)
+    if args.backfill_worker is not None:
+        backfill_worker(*args.backfill_worker)
+    elif args.rebuild is not None:
+        rebuild(args.rebuild, args.workers)
+    else:
+        try:
+            if settings.ETL_LISTEN_NOTIFY:
+                watch()
+            elif settings.ETL_ENGINE == "threads":
+                schedule()
+            else:
+                while True:
+                    main()
+                    sleep(ETL_REFRESH_TIME_SECONDS)
+        finally:
+            container.engine().close()
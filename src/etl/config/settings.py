@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Literal
 
-from pydantic import Field
+from pydantic import Field, root_validator
 from pydantic.env_settings import BaseSettings
 
 if TYPE_CHECKING:
@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     ES_HOST: str
     ES_PORT: int
     ES_RETRY_ON_TIMEOUT: bool = Field(True)
+    ES_BULK_THREAD_COUNT: int = Field(4)
+    ES_BULK_CHUNK_SIZE: int = Field(0)
+    ES_BULK_CHUNK_BYTES: int = Field(10 * 1024 * 1024)
 
     # Redis
     REDIS_HOST: str
@@ -38,6 +41,71 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = Field(..., env="NA_DB_PASSWORD")
     DB_HOST: str = Field(..., env="NA_DB_HOST")
     DB_PORT: int = Field(..., env="NA_DB_PORT")
+    DB_SERVER_SIDE_CURSORS: bool = Field(True)
+    DB_CURSOR_ITERSIZE: int = Field(2000)
+    DB_POOL_MIN_CONNECTIONS: int = Field(1)
+    DB_POOL_MAX_CONNECTIONS: int = Field(10)
+    DB_RECONNECT_MAX_TIME: float = Field(60.0)
+
+    # ETL
+    ETL_FILMWORK_BATCH_SIZE: int = Field(100)
+    ETL_GENRE_BATCH_SIZE: int = Field(100)
+    ETL_PERSON_BATCH_SIZE: int = Field(100)
+    ETL_ADAPTIVE_BATCH_SIZE: bool = Field(False)
+    ETL_BULK_TARGET_BYTES: int = Field(10 * 1024 * 1024)
+    ETL_BULK_MAX_SECONDS: float = Field(10.0)
+    ETL_MIN_BATCH_SIZE: int = Field(10)
+    ETL_MAX_BATCH_SIZE: int = Field(5000)
+    ETL_BULK_INGEST_THRESHOLD: int = Field(0)
+    ETL_SKIP_UNCHANGED_DOCUMENTS: bool = Field(True)
+    ETL_RAW_JSON_DOCUMENTS: bool = Field(False)
+    ETL_ENGINE: Literal["threads", "asyncio"] = Field("threads")
+    ETL_STAGED_PIPELINES: bool = Field(False)
+    ETL_EXTRACT_QUEUE_SIZE: int = Field(2)
+    ETL_TRANSFORM_QUEUE_SIZE: int = Field(2)
+    ETL_TRANSFORM_WORKERS: int = Field(0)
+    ETL_CHANGELOG: bool = Field(False)
+    ETL_CHANGE_PROBE: bool = Field(True)
+    ETL_EMBEDDED_MIN_DOCUMENTS: int = Field(100)
+    ETL_LISTEN_NOTIFY: bool = Field(False)
+    ETL_NOTIFY_DEBOUNCE_SECONDS: float = Field(1.0)
+    ETL_NOTIFY_POLL_INTERVAL_SECONDS: float = Field(300.0)
+    ETL_BACKFILL_PARTITIONS: int = Field(64)
+    ETL_BACKFILL_LEASE_TTL_SECONDS: float = Field(60.0)
+    ETL_BACKFILL_MAX_ATTEMPTS: int = Field(3)
+    ETL_BACKFILL_MAX_RESTARTS: int = Field(3)
+    ETL_LEADER_LEASE_TTL_SECONDS: float = Field(0.0)
+    ETL_FILMWORK_RUN_INTERVAL_SECONDS: float = Field(30.0)
+    ETL_GENRE_RUN_INTERVAL_SECONDS: float = Field(30.0)
+    ETL_PERSON_RUN_INTERVAL_SECONDS: float = Field(30.0)
+    ETL_MAX_RUN_INTERVAL_SECONDS: float = Field(300.0)
+    ETL_IDLE_BACKOFF_FACTOR: float = Field(2.0)
+    ETL_RUN_INTERVAL_JITTER: float = Field(0.1)
+    ETL_STOP_TIMEOUT_SECONDS: float = Field(60.0)
+
+    @root_validator(skip_on_failure=True)
+    def check_changelog_engine(cls, values: dict[str, Any]) -> dict[str, Any]:
+        if values["ETL_CHANGELOG"] and values["ETL_ENGINE"] != "threads":
+            raise ValueError("Changelog mode is supported by the `threads` engine only")
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def check_leader_lease_engine(cls, values: dict[str, Any]) -> dict[str, Any]:
+        if values["ETL_LEADER_LEASE_TTL_SECONDS"] and values["ETL_ENGINE"] != "threads":
+            raise ValueError("Leader election is supported by the `threads` engine only")
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def check_staged_pipelines_engine(cls, values: dict[str, Any]) -> dict[str, Any]:
+        if values["ETL_STAGED_PIPELINES"] and values["ETL_ENGINE"] != "threads":
+            raise ValueError("Staged pipelines are supported by the `threads` engine only")
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def check_bulk_ingest_engine(cls, values: dict[str, Any]) -> dict[str, Any]:
+        if values["ETL_BULK_INGEST_THRESHOLD"] and values["ETL_ENGINE"] != "threads":
+            raise ValueError("Bulk ingest threshold is supported by the `threads` engine only")
+        return values
 
     class Config(EnvConfig):
         env_prefix = "NE_"
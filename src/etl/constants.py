@@ -2,3 +2,17 @@ from typing import Final
 
 # ETL pipeline refresh time (rerun)
 ETL_REFRESH_TIME_SECONDS: Final[int] = 30
+
+# Field that marks rows of deleted entities, documents of such entities are deleted from Elasticsearch
+DELETED_ENTITY_FIELD: Final[str] = "_deleted"
+
+# Field that marks rows of document fragments, holds type of the entities the fragment is built from
+FRAGMENT_ENTITY_FIELD: Final[str] = "_fragment"
+
+# Field that marks rows of entities embedded in documents, holds the entity type; such entities are updated in place in
+# all documents that embed them
+EMBEDDED_ENTITY_FIELD: Final[str] = "_embedded"
+
+# Column with the whole Postgres row rendered as JSON text: such rows are passed to the transform pool workers as is,
+# without being decoded in the ETL process
+RAW_ROW_FIELD: Final[str] = "_raw_row"
@@ -1,7 +1,10 @@
+import operator
+
 from dependency_injector import containers, providers
 
 from etl.config.logging import configure_logger
-from etl.domain import filmworks, genres, persons, pipelines
+from etl.domain import aio, backfill, batching, engines, filmworks, genres, persons, pipelines, schedulers, watchers
+from etl.infrastructure import workers
 from etl.infrastructure.db import elastic, postgres, redis, storage
 
 
@@ -20,20 +23,31 @@ class Container(containers.DeclarativeContainer):
 
     # Infrastructure
 
+    elastic_serializer = providers.Singleton(elastic.OrjsonSerializer)
+
     elastic_connection = providers.Resource(
         elastic.init_elastic,
         host=config.ES_HOST,
         port=config.ES_PORT,
         retry_on_timeout=config.ES_RETRY_ON_TIMEOUT,
+        serializer=elastic_serializer,
     )
 
-    postgres_connection = providers.Resource(
-        postgres.init_postgres,
+    postgres_pool = providers.Resource(
+        postgres.init_postgres_pool,
         db_name=config.DB_NAME,
         db_user=config.DB_USER,
         db_password=config.DB_PASSWORD,
         host=config.DB_HOST,
         port=config.DB_PORT,
+        min_connections=config.DB_POOL_MIN_CONNECTIONS,
+        max_connections=config.DB_POOL_MAX_CONNECTIONS,
+        reconnect_max_time=config.DB_RECONNECT_MAX_TIME,
+    )
+
+    postgres_listener = providers.Resource(
+        postgres.init_postgres_listener,
+        pg_pool=postgres_pool,
     )
 
     redis_connection = providers.Resource(
@@ -48,33 +62,146 @@ class Container(containers.DeclarativeContainer):
         redis_client=redis_connection,
     )
 
+    transform_process_pool = providers.Resource(
+        workers.init_process_pool,
+        workers=config.ETL_TRANSFORM_WORKERS,
+    )
+
+    # Infrastructure -> Async clients (are bound to the event loop of the async engine)
+
+    async_elastic_connection = providers.Singleton(
+        elastic.create_async_elastic,
+        host=config.ES_HOST,
+        port=config.ES_PORT,
+        retry_on_timeout=config.ES_RETRY_ON_TIMEOUT,
+        serializer=elastic_serializer,
+    )
+
+    async_postgres_pool = providers.Singleton(
+        postgres.create_async_postgres_pool,
+        db_name=config.DB_NAME,
+        db_user=config.DB_USER,
+        db_password=config.DB_PASSWORD,
+        host=config.DB_HOST,
+        port=config.DB_PORT,
+        min_connections=config.DB_POOL_MIN_CONNECTIONS,
+        max_connections=config.DB_POOL_MAX_CONNECTIONS,
+        reconnect_max_time=config.DB_RECONNECT_MAX_TIME,
+    )
+
+    async_redis_connection = providers.Singleton(
+        redis.create_async_redis,
+        host=config.REDIS_HOST,
+        port=config.REDIS_PORT,
+        decode_responses=config.REDIS_DECODE_RESPONSES,
+    )
+
+    async_redis_storage = providers.Singleton(
+        storage.AsyncRedisStorage,
+        redis_client=async_redis_connection,
+    )
+
+    # ETL -> Batch sizers
+
+    filmwork_batch_sizer = providers.Singleton(
+        batching.BatchSizer,
+        batch_size=config.ETL_FILMWORK_BATCH_SIZE,
+        adaptive=config.ETL_ADAPTIVE_BATCH_SIZE,
+        target_bytes=config.ETL_BULK_TARGET_BYTES,
+        max_seconds=config.ETL_BULK_MAX_SECONDS,
+        min_batch_size=config.ETL_MIN_BATCH_SIZE,
+        max_batch_size=config.ETL_MAX_BATCH_SIZE,
+    )
+
+    genre_batch_sizer = providers.Singleton(
+        batching.BatchSizer,
+        batch_size=config.ETL_GENRE_BATCH_SIZE,
+        adaptive=config.ETL_ADAPTIVE_BATCH_SIZE,
+        target_bytes=config.ETL_BULK_TARGET_BYTES,
+        max_seconds=config.ETL_BULK_MAX_SECONDS,
+        min_batch_size=config.ETL_MIN_BATCH_SIZE,
+        max_batch_size=config.ETL_MAX_BATCH_SIZE,
+    )
+
+    person_batch_sizer = providers.Singleton(
+        batching.BatchSizer,
+        batch_size=config.ETL_PERSON_BATCH_SIZE,
+        adaptive=config.ETL_ADAPTIVE_BATCH_SIZE,
+        target_bytes=config.ETL_BULK_TARGET_BYTES,
+        max_seconds=config.ETL_BULK_MAX_SECONDS,
+        min_batch_size=config.ETL_MIN_BATCH_SIZE,
+        max_batch_size=config.ETL_MAX_BATCH_SIZE,
+    )
+
     # ETL -> Extractors
 
     filmwork_extractor = providers.Singleton(
         filmworks.FilmworkExtractor,
-        pg_conn=postgres_connection,
+        pg_pool=postgres_pool,
         storage=redis_storage,
+        batch_sizer=filmwork_batch_sizer,
+        server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+        cursor_itersize=config.DB_CURSOR_ITERSIZE,
+        raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+        raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+        changelog=config.ETL_CHANGELOG,
+        embedded_min_documents=config.ETL_EMBEDDED_MIN_DOCUMENTS,
+        partial_updates=providers.Callable(operator.not_, config.ETL_LEADER_LEASE_TTL_SECONDS),
+        change_probe=config.ETL_CHANGE_PROBE,
     )
 
     genre_extractor = providers.Singleton(
         genres.GenreExtractor,
-        pg_conn=postgres_connection,
+        pg_pool=postgres_pool,
         storage=redis_storage,
+        batch_sizer=genre_batch_sizer,
+        server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+        cursor_itersize=config.DB_CURSOR_ITERSIZE,
+        raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+        raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+        changelog=config.ETL_CHANGELOG,
+        embedded_min_documents=config.ETL_EMBEDDED_MIN_DOCUMENTS,
+        partial_updates=providers.Callable(operator.not_, config.ETL_LEADER_LEASE_TTL_SECONDS),
+        change_probe=config.ETL_CHANGE_PROBE,
     )
 
     person_extractor = providers.Singleton(
         persons.PersonExtractor,
-        pg_conn=postgres_connection,
+        pg_pool=postgres_pool,
         storage=redis_storage,
+        batch_sizer=person_batch_sizer,
+        server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+        cursor_itersize=config.DB_CURSOR_ITERSIZE,
+        raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+        raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+        changelog=config.ETL_CHANGELOG,
+        embedded_min_documents=config.ETL_EMBEDDED_MIN_DOCUMENTS,
+        partial_updates=providers.Callable(operator.not_, config.ETL_LEADER_LEASE_TTL_SECONDS),
+        change_probe=config.ETL_CHANGE_PROBE,
     )
 
     # ETL -> Transformers
 
-    filmwork_transformer = providers.Singleton(filmworks.FilmworkTransformer)
+    filmwork_transformer = providers.Singleton(
+        filmworks.FilmworkTransformer,
+        process_pool=transform_process_pool,
+        serializer=elastic_serializer,
+        workers=config.ETL_TRANSFORM_WORKERS,
+    )
 
-    genre_transformer = providers.Singleton(genres.GenreTransformer)
+    genre_transformer = providers.Singleton(
+        genres.GenreTransformer,
+        process_pool=transform_process_pool,
+        serializer=elastic_serializer,
+        workers=config.ETL_TRANSFORM_WORKERS,
+    )
 
-    person_transformer = providers.Singleton(persons.PersonTransformer)
+    person_transformer = providers.Singleton(
+        persons.PersonTransformer,
+        process_pool=transform_process_pool,
+        serializer=elastic_serializer,
+        workers=config.ETL_TRANSFORM_WORKERS,
+    )
 
     # ETL -> Loaders
 
@@ -82,18 +209,30 @@ class Container(containers.DeclarativeContainer):
         filmworks.FilmworkLoader,
         elastic_client=elastic_connection,
         storage=redis_storage,
+        thread_count=config.ES_BULK_THREAD_COUNT,
+        chunk_size=config.ES_BULK_CHUNK_SIZE,
+        chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+        skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
     )
 
     genre_loader = providers.Singleton(
         genres.GenreLoader,
         elastic_client=elastic_connection,
         storage=redis_storage,
+        thread_count=config.ES_BULK_THREAD_COUNT,
+        chunk_size=config.ES_BULK_CHUNK_SIZE,
+        chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+        skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
     )
 
     person_loader = providers.Singleton(
         persons.PersonLoader,
         elastic_client=elastic_connection,
         storage=redis_storage,
+        thread_count=config.ES_BULK_THREAD_COUNT,
+        chunk_size=config.ES_BULK_CHUNK_SIZE,
+        chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+        skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
     )
 
     # ETL -> Pipelines
@@ -104,6 +243,12 @@ class Container(containers.DeclarativeContainer):
         transformer=filmwork_transformer,
         extractor=filmwork_extractor,
         storage=redis_storage,
+        batch_sizer=filmwork_batch_sizer,
+        bulk_ingest_threshold=config.ETL_BULK_INGEST_THRESHOLD,
+        staged=config.ETL_STAGED_PIPELINES,
+        extract_queue_size=config.ETL_EXTRACT_QUEUE_SIZE,
+        transform_queue_size=config.ETL_TRANSFORM_QUEUE_SIZE,
+        leader_lease_ttl_seconds=config.ETL_LEADER_LEASE_TTL_SECONDS,
     )
 
     genre_pipeline = providers.Singleton(
@@ -112,6 +257,12 @@ class Container(containers.DeclarativeContainer):
         transformer=genre_transformer,
         extractor=genre_extractor,
         storage=redis_storage,
+        batch_sizer=genre_batch_sizer,
+        bulk_ingest_threshold=config.ETL_BULK_INGEST_THRESHOLD,
+        staged=config.ETL_STAGED_PIPELINES,
+        extract_queue_size=config.ETL_EXTRACT_QUEUE_SIZE,
+        transform_queue_size=config.ETL_TRANSFORM_QUEUE_SIZE,
+        leader_lease_ttl_seconds=config.ETL_LEADER_LEASE_TTL_SECONDS,
     )
 
     person_pipeline = providers.Singleton(
@@ -120,6 +271,180 @@ class Container(containers.DeclarativeContainer):
         transformer=person_transformer,
         extractor=person_extractor,
         storage=redis_storage,
+        batch_sizer=person_batch_sizer,
+        bulk_ingest_threshold=config.ETL_BULK_INGEST_THRESHOLD,
+        staged=config.ETL_STAGED_PIPELINES,
+        extract_queue_size=config.ETL_EXTRACT_QUEUE_SIZE,
+        transform_queue_size=config.ETL_TRANSFORM_QUEUE_SIZE,
+        leader_lease_ttl_seconds=config.ETL_LEADER_LEASE_TTL_SECONDS,
     )
 
     pipelines_to_run = providers.List(filmwork_pipeline, genre_pipeline, person_pipeline)
+
+    pipelines_by_name = providers.Dict(
+        filmwork=filmwork_pipeline,
+        genre=genre_pipeline,
+        person=person_pipeline,
+    )
+
+    # ETL -> Scheduler
+
+    pipeline_scheduler = providers.Singleton(
+        schedulers.PipelineScheduler,
+        scheduled_pipelines=providers.List(
+            providers.Factory(
+                schedulers.ScheduledPipeline,
+                pipeline=filmwork_pipeline,
+                interval_seconds=config.ETL_FILMWORK_RUN_INTERVAL_SECONDS,
+                max_interval_seconds=config.ETL_MAX_RUN_INTERVAL_SECONDS,
+                backoff_factor=config.ETL_IDLE_BACKOFF_FACTOR,
+                jitter=config.ETL_RUN_INTERVAL_JITTER,
+            ),
+            providers.Factory(
+                schedulers.ScheduledPipeline,
+                pipeline=genre_pipeline,
+                interval_seconds=config.ETL_GENRE_RUN_INTERVAL_SECONDS,
+                max_interval_seconds=config.ETL_MAX_RUN_INTERVAL_SECONDS,
+                backoff_factor=config.ETL_IDLE_BACKOFF_FACTOR,
+                jitter=config.ETL_RUN_INTERVAL_JITTER,
+            ),
+            providers.Factory(
+                schedulers.ScheduledPipeline,
+                pipeline=person_pipeline,
+                interval_seconds=config.ETL_PERSON_RUN_INTERVAL_SECONDS,
+                max_interval_seconds=config.ETL_MAX_RUN_INTERVAL_SECONDS,
+                backoff_factor=config.ETL_IDLE_BACKOFF_FACTOR,
+                jitter=config.ETL_RUN_INTERVAL_JITTER,
+            ),
+        ),
+        stop_timeout_seconds=config.ETL_STOP_TIMEOUT_SECONDS,
+    )
+
+    # ETL -> Backfill of rebuilt indices
+
+    index_backfill = providers.Singleton(
+        backfill.Backfill,
+        storage=redis_storage,
+        partitions=config.ETL_BACKFILL_PARTITIONS,
+        lease_ttl_seconds=config.ETL_BACKFILL_LEASE_TTL_SECONDS,
+        max_attempts=config.ETL_BACKFILL_MAX_ATTEMPTS,
+        max_restarts=config.ETL_BACKFILL_MAX_RESTARTS,
+    )
+
+    # ETL -> Async pipelines
+
+    async_filmwork_pipeline = providers.Singleton(
+        aio.AsyncETLPipeline,
+        loader=providers.Singleton(
+            aio.AsyncElasticLoader,
+            loader_class=filmworks.FilmworkLoader,
+            elastic_client=async_elastic_connection,
+            storage=async_redis_storage,
+            concurrency=config.ES_BULK_THREAD_COUNT,
+            chunk_size=config.ES_BULK_CHUNK_SIZE,
+            chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+            skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
+        ),
+        transformer=filmwork_transformer,
+        extractor=providers.Singleton(
+            aio.AsyncPgExtractor,
+            extractor_class=filmworks.FilmworkExtractor,
+            pg_pool=async_postgres_pool,
+            storage=async_redis_storage,
+            batch_sizer=filmwork_batch_sizer,
+            server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+            cursor_itersize=config.DB_CURSOR_ITERSIZE,
+            raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+            raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+            change_probe=config.ETL_CHANGE_PROBE,
+        ),
+        storage=async_redis_storage,
+        batch_sizer=filmwork_batch_sizer,
+    )
+
+    async_genre_pipeline = providers.Singleton(
+        aio.AsyncETLPipeline,
+        loader=providers.Singleton(
+            aio.AsyncElasticLoader,
+            loader_class=genres.GenreLoader,
+            elastic_client=async_elastic_connection,
+            storage=async_redis_storage,
+            concurrency=config.ES_BULK_THREAD_COUNT,
+            chunk_size=config.ES_BULK_CHUNK_SIZE,
+            chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+            skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
+        ),
+        transformer=genre_transformer,
+        extractor=providers.Singleton(
+            aio.AsyncPgExtractor,
+            extractor_class=genres.GenreExtractor,
+            pg_pool=async_postgres_pool,
+            storage=async_redis_storage,
+            batch_sizer=genre_batch_sizer,
+            server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+            cursor_itersize=config.DB_CURSOR_ITERSIZE,
+            raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+            raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+            change_probe=config.ETL_CHANGE_PROBE,
+        ),
+        storage=async_redis_storage,
+        batch_sizer=genre_batch_sizer,
+    )
+
+    async_person_pipeline = providers.Singleton(
+        aio.AsyncETLPipeline,
+        loader=providers.Singleton(
+            aio.AsyncElasticLoader,
+            loader_class=persons.PersonLoader,
+            elastic_client=async_elastic_connection,
+            storage=async_redis_storage,
+            concurrency=config.ES_BULK_THREAD_COUNT,
+            chunk_size=config.ES_BULK_CHUNK_SIZE,
+            chunk_bytes=config.ES_BULK_CHUNK_BYTES,
+            skip_unchanged=config.ETL_SKIP_UNCHANGED_DOCUMENTS,
+        ),
+        transformer=person_transformer,
+        extractor=providers.Singleton(
+            aio.AsyncPgExtractor,
+            extractor_class=persons.PersonExtractor,
+            pg_pool=async_postgres_pool,
+            storage=async_redis_storage,
+            batch_sizer=person_batch_sizer,
+            server_side_cursors=config.DB_SERVER_SIDE_CURSORS,
+            cursor_itersize=config.DB_CURSOR_ITERSIZE,
+            raw_json_documents=config.ETL_RAW_JSON_DOCUMENTS,
+            raw_rows=providers.Callable(bool, config.ETL_TRANSFORM_WORKERS),
+            change_probe=config.ETL_CHANGE_PROBE,
+        ),
+        storage=async_redis_storage,
+        batch_sizer=person_batch_sizer,
+    )
+
+    async_pipelines_to_run = providers.List(async_filmwork_pipeline, async_genre_pipeline, async_person_pipeline)
+
+    # ETL -> Engines
+
+    thread_engine = providers.Singleton(engines.ThreadEngine, pipelines=pipelines_to_run)
+
+    async_engine = providers.Singleton(
+        engines.AsyncEngine,
+        pipelines=async_pipelines_to_run,
+        pg_pool=async_postgres_pool,
+        elastic_client=async_elastic_connection,
+        redis_client=async_redis_connection,
+    )
+
+    engine = providers.Selector(
+        config.ETL_ENGINE,
+        threads=thread_engine,
+        asyncio=async_engine,
+    )
+
+    # ETL -> Change watcher
+
+    change_watcher = providers.Singleton(
+        watchers.ChangeWatcher,
+        listener=postgres_listener,
+        debounce_seconds=config.ETL_NOTIFY_DEBOUNCE_SECONDS,
+        poll_interval_seconds=config.ETL_NOTIFY_POLL_INTERVAL_SECONDS,
+    )
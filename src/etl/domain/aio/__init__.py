@@ -0,0 +1,9 @@
+from .extractors import AsyncPgExtractor
+from .loaders import AsyncElasticLoader
+from .pipelines import AsyncETLPipeline
+
+__all__ = [
+    "AsyncPgExtractor",
+    "AsyncElasticLoader",
+    "AsyncETLPipeline",
+]
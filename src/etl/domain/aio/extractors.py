@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING, Any, cast
+
+from etl.domain.checkpoints import Checkpoint
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Sequence
+
+    from psycopg import AsyncConnection, AsyncCursor
+    from psycopg_pool import AsyncConnectionPool
+
+    from etl.domain.batching import BatchSizer
+    from etl.domain.extractors import SQL, ChangeProbe, PgExtractor
+    from etl.infrastructure.db.storage import AsyncBaseStorage, AsyncStorageBatch
+
+    PgRowT = dict[str, Any]
+
+
+class AsyncPgExtractor:
+    """Async `data extractor` from Postgres.
+
+    Queries, state keys and config are taken from the given `PgExtractor` subclass.
+    """
+
+    def __init__(
+        self,
+        extractor_class: type[PgExtractor],
+        pg_pool: AsyncConnectionPool,
+        storage: AsyncBaseStorage,
+        batch_sizer: BatchSizer,
+        *,
+        server_side_cursors: bool = True,
+        cursor_itersize: int = 2000,
+        raw_json_documents: bool = False,
+        raw_rows: bool = False,
+        change_probe: bool = False,
+    ) -> None:
+        self.extractor_class = extractor_class
+        self._pg_pool = pg_pool
+        self._storage = storage
+        self._batch_sizer = batch_sizer
+        self._server_side_cursors = server_side_cursors
+        self._cursor_itersize = cursor_itersize
+        self._raw_json_documents = raw_json_documents
+        self._raw_rows = raw_rows
+        self._change_probe = change_probe
+
+    @property
+    def etl_checkpoint_key(self) -> str:
+        return self.extractor_class.etl_checkpoint_key
+
+    @property
+    def source_tables(self) -> tuple[str, ...]:
+        return self.extractor_class.source_tables
+
+    @property
+    def probes_changes(self) -> bool:
+        """Whether incremental runs are skipped unless the change probe has moved, see `PgExtractor.probes_changes`."""
+        return self._change_probe and self.extractor_class.sql_change_probe is not None
+
+    async def probe_changes(self) -> ChangeProbe:
+        """Run the change probe and compare it with the one of the last synced run."""
+        extractor_class = self.extractor_class
+        async with self._pg_pool.connection() as pg_conn:
+            sql = cast("SQL", extractor_class.sql_change_probe)
+            row, = chain.from_iterable([chunk async for chunk in self.load_data(pg_conn, sql)])
+        values = extractor_class.get_change_probe_values(row)
+        saved_values = await self._storage.retrieve_map_values(extractor_class.etl_change_probe_key, *values)
+        return extractor_class.make_change_probe(values, saved_values)
+
+    def save_change_probe(self, probe: ChangeProbe, state: AsyncStorageBatch) -> None:
+        """Save the change probe once the changes found after it have been synced."""
+        state.save_map(self.extractor_class.etl_change_probe_key, probe.values)
+
+    async def extract(self, checkpoint: Checkpoint | None = None) -> AsyncIterator[tuple[list[PgRowT], Checkpoint]]:
+        """Extract batches of changed entities paired with their checkpoints, see `PgExtractor.extract`."""
+        if checkpoint is None:
+            checkpoint = await self.get_checkpoint()
+        async with self._pg_pool.connection() as pg_conn:
+            async for batch in self.load_batches(pg_conn, checkpoint):
+                yield batch
+
+    async def load_batches(
+        self, pg_conn: AsyncConnection[PgRowT], checkpoint: Checkpoint,
+    ) -> AsyncIterator[tuple[list[PgRowT], Checkpoint]]:
+        """Load batches of data from Postgres, see `PgExtractor.load_batches`."""
+        extractor_class = self.extractor_class
+        sql = self.get_data_query()
+        async for entities in self.get_entities_to_update(pg_conn, checkpoint):
+            params = extractor_class.get_data_params([entity[extractor_class.entity_id_field] for entity in entities])
+            batch = list(chain.from_iterable([chunk async for chunk in self.load_data(pg_conn, sql, params)]))
+            yield batch, extractor_class.get_batch_checkpoint(entities)
+
+    async def get_entities_to_update(
+        self, pg_conn: AsyncConnection[PgRowT], checkpoint: Checkpoint,
+    ) -> AsyncIterator[list[PgRowT]]:
+        """Get chunks of `(id, modified)` of entities that have changed after the `checkpoint`."""
+        params = self.extractor_class.get_sync_params(checkpoint)
+        async for chunk in self.load_data(pg_conn, self.extractor_class.sql_entities_to_sync, params):
+            yield chunk
+
+    async def get_checkpoint(self, key: str | None = None) -> Checkpoint:
+        """Get checkpoint of the last synced entity."""
+        return Checkpoint.load(await self._storage.retrieve(key or self.etl_checkpoint_key))
+
+    def get_data_query(self) -> SQL:
+        """Get query for the data of changed entities, see `PgExtractor.select_data_query`."""
+        return self.extractor_class.select_data_query(
+            raw_json_documents=self._raw_json_documents, raw_rows=self._raw_rows,
+        )
+
+    async def load_data(
+        self, pg_conn: AsyncConnection[PgRowT], sql: SQL, params: Sequence[Any] | dict[str, Any] | None = None,
+    ) -> AsyncIterator[list[PgRowT]]:
+        """Fetch data from Postgres in `batch_size` batches."""
+        async with self._get_cursor(pg_conn) as cursor:
+            await cursor.execute(sql, params)
+            results: list[PgRowT] = []
+            async for row in cursor:
+                results.append(row)
+                if len(results) >= self._batch_sizer.batch_size:
+                    yield results
+                    results = []
+            if results:
+                yield results
+
+    def _get_cursor(self, pg_conn: AsyncConnection[PgRowT]) -> AsyncCursor[PgRowT]:
+        if not self._server_side_cursors:
+            return pg_conn.cursor()
+        cursor = pg_conn.cursor(name=self.extractor_class.get_cursor_name())
+        cursor.itersize = self._cursor_itersize
+        return cursor
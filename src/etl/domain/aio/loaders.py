@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from elasticsearch import helpers
+
+from etl.domain.loaders import LoadStats
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from elasticsearch import AsyncElasticsearch
+
+    from etl.domain.loaders import BulkActionT, BulkChunkT, BulkItemT, ElasticLoader
+    from etl.infrastructure.db.storage import AsyncBaseStorage, AsyncStorageBatch
+
+
+class AsyncElasticLoader:
+    """Async data `loader` to Elasticsearch.
+
+    Index config and state keys are taken from the given `ElasticLoader` subclass. Bulk requests of a batch are sent
+    concurrently, up to `concurrency` requests at once.
+    Bulk ingest and index rebuilds are managed by the sync loader; documents are still written to the index being
+    rebuilt.
+    """
+
+    def __init__(
+        self,
+        loader_class: type[ElasticLoader],
+        elastic_client: AsyncElasticsearch,
+        storage: AsyncBaseStorage,
+        *,
+        concurrency: int = 4,
+        chunk_size: int = 0,
+        chunk_bytes: int = 10 * 1024 * 1024,
+        skip_unchanged: bool = True,
+    ) -> None:
+        self.loader_class = loader_class
+        self._elastic_client = elastic_client
+        self._storage = storage
+        self._concurrency = concurrency
+        self._chunk_size = chunk_size
+        self._chunk_bytes = chunk_bytes
+        self._skip_unchanged = skip_unchanged
+        self._rebuild_index: str | None = None
+
+    @property
+    def es_index_name(self) -> str:
+        return self.loader_class.es_index_name
+
+    async def load(self, data: Iterable[dict[str, Any]], state: AsyncStorageBatch | None = None) -> LoadStats:
+        """Load data to the live index and, while it is being rebuilt, to the new index version.
+
+        State changes are queued to the `state` batch if it is given.
+        """
+        indices = [self.es_index_name]
+        if self._rebuild_index is not None:
+            indices.append(self._rebuild_index)
+        return await self.update_index(data, indices, skip_unchanged=self._skip_unchanged, state=state)
+
+    async def prepare_index(self) -> None:
+        """Make sure that the index exists before loading data, see `ElasticLoader.prepare_index`."""
+        await self.restore_index_settings()
+        self._rebuild_index = await self._storage.retrieve(self.loader_class.etl_rebuild_index_key)
+        if not await self._elastic_client.indices.exists(index=self.es_index_name):
+            await self.create_index()
+            await self._storage.remove(self.loader_class.etl_hashes_key)
+
+    async def restore_index_settings(self) -> None:
+        """Restore index settings left over from an interrupted bulk ingest."""
+        original_settings = await self._storage.retrieve(self.loader_class.etl_ingest_settings_key)
+        if original_settings is None:
+            return
+        logging.info("Restore settings of the index `%s` after bulk ingest", self.es_index_name)
+        indices = self._elastic_client.indices
+        await indices.put_settings(index=self.es_index_name, body=json.loads(original_settings))
+        await indices.forcemerge(index=self.es_index_name, request_timeout=self.loader_class.es_maintenance_timeout)
+        await indices.refresh(index=self.es_index_name)
+        await self._storage.remove(self.loader_class.etl_ingest_settings_key)
+
+    async def create_index(self) -> None:
+        """Create the next index version behind the `es_index_name` alias."""
+        loader_class = self.loader_class
+        await self._elastic_client.indices.create(
+            index=await self.get_next_index_version(),
+            body={**loader_class.es_index, "aliases": {self.es_index_name: {}}},
+            ignore=[400],
+            timeout=loader_class.es_timeout,
+        )
+
+    async def get_next_index_version(self) -> str:
+        """Get name of the next index version, see `ElasticLoader.get_next_index_version`."""
+        indices = await self._elastic_client.indices.get_alias(
+            index=f"{self.es_index_name}{self.loader_class.es_index_version_separator}*", ignore_unavailable=True,
+        )
+        return self.loader_class.make_next_index_version(indices)
+
+    async def update_index(
+        self,
+        data: Iterable[dict[str, Any]],
+        indices: Sequence[str],
+        *,
+        skip_unchanged: bool = False,
+        state: AsyncStorageBatch | None = None,
+    ) -> LoadStats:
+        """Update documents in the given indices, see `ElasticLoader.update_index`."""
+        stats = LoadStats()
+        digests: dict[str, str] = {}
+        documents = list(self.serialize_documents(data))
+        if skip_unchanged:
+            documents = await self.skip_unchanged_documents(documents, stats, digests)
+        loader_class = self.loader_class
+        semaphore = asyncio.Semaphore(self._concurrency)
+        chunks = loader_class.chunk_actions(
+            loader_class.expand_actions(documents, stats, indices), self._chunk_size, self._chunk_bytes,
+        )
+        results = await asyncio.gather(*(self._bulk(chunk, semaphore) for chunk in chunks))
+        errors: list[dict[str, Any]] = []
+        for items, seconds in results:
+            stats.add_request(max(len(items) // len(indices), 1), seconds)
+            for ok, item in items:
+                if ok:
+                    stats.documents += 1
+                else:
+                    errors.append(item)
+        if errors:
+            logging.error("Failed to index %d document(s) to the index `%s`", len(errors), self.es_index_name)
+            raise helpers.BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+        if digests and state is not None:
+            state.save_map(self.loader_class.etl_hashes_key, digests)
+        elif digests:
+            await self._storage.save_map(self.loader_class.etl_hashes_key, digests)
+        return stats
+
+    async def _bulk(self, chunk: BulkChunkT, semaphore: asyncio.Semaphore) -> tuple[list[BulkItemT], float]:
+        """Send a bulk request, see `ElasticLoader._bulk`."""
+        loader_class = self.loader_class
+        body = loader_class.make_bulk_body(chunk, self._elastic_client.transport.serializer)
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await self._elastic_client.bulk(body=body)
+            seconds = time.perf_counter() - started_at
+        return [loader_class.check_bulk_item(item) for item in response["items"]], seconds
+
+    def serialize_documents(self, data: Iterable[dict[str, Any]]) -> Iterator[BulkActionT]:
+        """Expand bulk actions and serialize documents, see `ElasticLoader.serialize_actions`."""
+        return self.loader_class.serialize_actions(data, self._elastic_client.transport.serializer)
+
+    async def skip_unchanged_documents(
+        self, documents: BulkChunkT, stats: LoadStats, digests: dict[str, str],
+    ) -> BulkChunkT:
+        """Drop documents that are identical to the ones loaded before, see `ElasticLoader.skip_unchanged_documents`."""
+        if not documents:
+            return documents
+        loader_class = self.loader_class
+        documents_ids = [loader_class.get_document_id(operation) for operation, _ in documents]
+        stored_digests = await self._storage.retrieve_map_values(loader_class.etl_hashes_key, *documents_ids)
+        return list(loader_class.select_changed_documents(documents, stored_digests, stats, digests))
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+from typing import TYPE_CHECKING
+
+from etl.domain.pipelines import RunReport
+
+if TYPE_CHECKING:
+    from etl.domain.batching import BatchSizer
+    from etl.domain.checkpoints import Checkpoint
+    from etl.domain.extractors import ChangeProbe
+    from etl.domain.transformers import ElasticTransformer
+    from etl.infrastructure.db.storage import AsyncBaseStorage, AsyncStorageBatch
+
+    from .extractors import AsyncPgExtractor
+    from .loaders import AsyncElasticLoader
+
+
+@dataclasses.dataclass
+class AsyncETLPipeline:
+    """Async ETL pipeline.
+
+    State changes of a loaded batch (checkpoint and digests) are committed in one transaction while the next batch
+    is being extracted.
+    """
+
+    loader: AsyncElasticLoader
+    transformer: ElasticTransformer
+    extractor: AsyncPgExtractor
+    storage: AsyncBaseStorage
+    batch_sizer: BatchSizer
+
+    # Totals of probe hits and misses, see `ETLPipeline.probe_hits`
+    probe_hits: int = dataclasses.field(default=0, init=False)
+    probe_misses: int = dataclasses.field(default=0, init=False)
+
+    async def execute(self) -> RunReport:
+        await self.loader.prepare_index()
+        report = RunReport()
+        probe = await self.probe_changes(report)
+        if report.probe_skipped:
+            logging.debug(
+                "Index `%s`: source tables have not changed, run skipped (%d of %d probed run(s) skipped)",
+                self.loader.es_index_name, self.probe_hits, self.probe_hits + self.probe_misses,
+            )
+            return report
+        state_saved: asyncio.Task[None] | None = None
+        try:
+            async for batch, checkpoint in self.extractor.extract():
+                state = self.storage.batch()
+                stats = await self.loader.load(self.transformer.transform(batch), state=state)
+                self.update_checkpoint_state(checkpoint, state)
+                if state_saved is not None:
+                    await state_saved
+                state_saved = asyncio.create_task(state.execute())
+                self.batch_sizer.observe(stats)
+                report.add(stats)
+            if probe is not None:
+                state = self.storage.batch()
+                self.extractor.save_change_probe(probe, state)
+                if state_saved is not None:
+                    await state_saved
+                state_saved = asyncio.create_task(state.execute())
+        finally:
+            if state_saved is not None:
+                await state_saved
+        if report.batches:
+            logging.info(
+                "Index `%s`: %d document(s) written, %d unchanged document(s) skipped in %d batch(es)",
+                self.loader.es_index_name, report.documents, report.skipped, report.batches,
+            )
+        return report
+
+    async def probe_changes(self, report: RunReport) -> ChangeProbe | None:
+        """Probe the source tables for changes before running the sync query, see `ETLPipeline.probe_changes`."""
+        if not self.extractor.probes_changes:
+            return None
+        probe = await self.extractor.probe_changes()
+        if probe.changed_tables:
+            self.probe_misses += 1
+            logging.debug(
+                "Index `%s`: changed tables: %s", self.loader.es_index_name, ", ".join(probe.changed_tables),
+            )
+        else:
+            self.probe_hits += 1
+            report.probe_skipped = True
+        return probe
+
+    def update_checkpoint_state(self, checkpoint: Checkpoint, state: AsyncStorageBatch) -> None:
+        state.save(self.extractor.etl_checkpoint_key, checkpoint.serialize())
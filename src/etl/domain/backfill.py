@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+from etl.infrastructure.db.storage import get_fencing_token_key
+
+from .leases import Lease, LeaseLostError
+
+if TYPE_CHECKING:
+    import subprocess
+    from collections.abc import Callable
+
+    from etl.infrastructure.db.storage import BaseStorage
+
+    from .pipelines import ETLPipeline
+
+# Size of the UUID space
+_ID_SPACE_SIZE = 1 << 128
+
+
+class BackfillError(Exception):
+    """Backfill has failed."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Partition:
+    """Range of entity IDs `[start, stop]`."""
+
+    number: int
+    start: uuid.UUID
+    stop: uuid.UUID
+
+    @classmethod
+    def split_id_space(cls, partitions: int) -> list[Partition]:
+        """Split the UUID space into `partitions` ranges of the same size.
+
+        Entity IDs are random UUIDs, so the ranges hold about the same number of entities.
+        """
+        bounds = [_ID_SPACE_SIZE * number // partitions for number in range(partitions + 1)]
+        return [
+            cls(number=number, start=uuid.UUID(int=bounds[number]), stop=uuid.UUID(int=bounds[number + 1] - 1))
+            for number in range(partitions)
+        ]
+
+
+class Backfill:
+    """Load of all entities into a rebuilt index by a pool of worker processes.
+
+    The ID space is split into `partitions` ranges, workers claim them with leases in the state storage and load them
+    in the ID order. Leases are renewed after every batch and the last loaded entity is saved as the partition
+    progress: partitions of a dead worker are taken over by others once the leases expire, from the last loaded batch.
+    A failed partition is retried up to `max_attempts` times, failed workers are restarted up to `max_restarts` times.
+
+    State is kept by the name of the rebuilt index, so an interrupted backfill is resumed.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        *,
+        partitions: int = 64,
+        lease_ttl_seconds: float = 60.0,
+        max_attempts: int = 3,
+        max_restarts: int = 3,
+        poll_interval_seconds: float = 1.0,
+    ) -> None:
+        self._storage = storage
+        self._partitions = partitions
+        self._lease_ttl_seconds = lease_ttl_seconds
+        self._max_attempts = max_attempts
+        self._max_restarts = max_restarts
+        self._poll_interval_seconds = poll_interval_seconds
+
+    def run(self, rebuild_index: str, workers: int, start_worker: Callable[[str], subprocess.Popen]) -> None:
+        """Run `workers` worker processes until all partitions are loaded.
+
+        `start_worker` is called with the index name and starts a process that calls `work` for the index.
+        """
+        partitions = self.get_partitions(rebuild_index)
+        logging.info(
+            "Backfill the index `%s`: %d partition(s), %d worker(s)", rebuild_index, len(partitions), workers,
+        )
+        processes = [start_worker(rebuild_index) for _ in range(workers)]
+        restarts = 0
+        try:
+            while processes:
+                time.sleep(self._poll_interval_seconds)
+                for process in [process for process in processes if process.poll() is not None]:
+                    processes.remove(process)
+                    if process.returncode == 0:
+                        continue
+                    self.check_attempts(rebuild_index, self.get_pending_partitions(rebuild_index))
+                    if restarts >= self._max_restarts:
+                        raise BackfillError(f"Backfill worker has failed with the exit code {process.returncode}")
+                    logging.warning("Backfill worker has failed with the exit code %d, restart", process.returncode)
+                    processes.append(start_worker(rebuild_index))
+                    restarts += 1
+        finally:
+            for process in processes:
+                process.terminate()
+        if pending := self.get_pending_partitions(rebuild_index):
+            raise BackfillError(f"{len(pending)} partition(s) of the index `{rebuild_index}` have not been loaded")
+        logging.info("Index `%s` has been backfilled", rebuild_index)
+
+    def work(self, pipeline: ETLPipeline, rebuild_index: str) -> None:
+        """Claim and load partitions until all of them are loaded, is run in worker processes.
+
+        Partitions leased by other workers are waited for, so they are taken over if their workers die.
+        """
+        while pending := self.get_pending_partitions(rebuild_index):
+            self.check_attempts(rebuild_index, pending)
+            offset = os.getpid() % len(pending)
+            for partition in pending[offset:] + pending[:offset]:
+                lease = Lease(self._storage, self._get_lease_key(rebuild_index, partition), self._lease_ttl_seconds)
+                if lease.acquire():
+                    self.try_load_partition(pipeline, rebuild_index, partition, lease)
+                    break
+            else:
+                time.sleep(self._poll_interval_seconds)
+
+    def try_load_partition(self, pipeline: ETLPipeline, rebuild_index: str, partition: Partition, lease: Lease) -> None:
+        """Load a leased partition, count failed attempts."""
+        try:
+            self.load_partition(pipeline, rebuild_index, partition, lease)
+        except LeaseLostError:
+            logging.warning("Lease of the partition %d has been lost", partition.number)
+        except Exception:
+            logging.exception("Failed to load the partition %d of the index `%s`", partition.number, rebuild_index)
+            self._storage.increment_map_value(self._get_key(rebuild_index, "attempts"), str(partition.number))
+        finally:
+            lease.release()
+
+    def load_partition(self, pipeline: ETLPipeline, rebuild_index: str, partition: Partition, lease: Lease) -> None:
+        """Load entities of the partition, starting after the last loaded one."""
+        progress_key = self._get_key(rebuild_index, "progress")
+        progress, = self._storage.retrieve_map_values(progress_key, str(partition.number))
+        after = uuid.UUID(progress) if progress is not None else None
+        for batch, last_entity_id in pipeline.extractor.extract_range(partition.start, partition.stop, after):
+            fence = pipeline.get_rebuild_fence(lease.check)
+            stats = pipeline.loader.load(pipeline.transform(batch), index=rebuild_index, fence=fence)
+            pipeline.batch_sizer.observe(stats)
+            lease.renew()
+            state = self._storage.batch()
+            state.save_map(progress_key, {str(partition.number): str(last_entity_id)})
+            lease.commit(state)
+        lease.renew()
+        state = self._storage.batch()
+        state.save_list(self._get_key(rebuild_index, "done"), partition.number)
+        lease.commit(state)
+        logging.debug("Partition %d of the index `%s` has been loaded", partition.number, rebuild_index)
+
+    def get_partitions(self, rebuild_index: str) -> list[Partition]:
+        """Get partitions of the backfill, their number is fixed once the backfill has started."""
+        key = self._get_key(rebuild_index, "partitions")
+        partitions = self._storage.retrieve(key)
+        if partitions is None:
+            self._storage.save(key, self._partitions)
+            return Partition.split_id_space(self._partitions)
+        return Partition.split_id_space(int(partitions))
+
+    def get_pending_partitions(self, rebuild_index: str) -> list[Partition]:
+        """Get partitions that have not been loaded yet."""
+        done = {int(number) for number in self._storage.retrieve_list(self._get_key(rebuild_index, "done")) or ()}
+        return [partition for partition in self.get_partitions(rebuild_index) if partition.number not in done]
+
+    def check_attempts(self, rebuild_index: str, partitions: list[Partition]) -> None:
+        """Raise `BackfillError` if any of the partitions has run out of attempts."""
+        if not partitions:
+            return
+        attempts = self._storage.retrieve_map_values(
+            self._get_key(rebuild_index, "attempts"), *(str(partition.number) for partition in partitions),
+        )
+        failed = [
+            partition.number
+            for partition, partition_attempts in zip(partitions, attempts, strict=True)
+            if int(partition_attempts or 0) >= self._max_attempts
+        ]
+        if failed:
+            failed_numbers = ", ".join(map(str, failed))
+            raise BackfillError(f"Partition(s) {failed_numbers} of the index `{rebuild_index}` have failed")
+
+    def clean(self, rebuild_index: str) -> None:
+        """Remove state of the backfill."""
+        for partition in self.get_partitions(rebuild_index):
+            self._storage.remove(get_fencing_token_key(self._get_lease_key(rebuild_index, partition)))
+        for name in ("partitions", "done", "progress", "attempts"):
+            self._storage.remove(self._get_key(rebuild_index, name))
+
+    def _get_lease_key(self, rebuild_index: str, partition: Partition) -> str:
+        return self._get_key(rebuild_index, f"lease:{partition.number}")
+
+    @staticmethod
+    def _get_key(rebuild_index: str, name: str) -> str:
+        return f"{rebuild_index}:backfill:{name}"
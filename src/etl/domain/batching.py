@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, ClassVar
+
+if TYPE_CHECKING:
+    from .loaders import LoadStats
+
+
+class BatchSizer:
+    """Size of batches of a single ETL pipeline.
+
+    In the adaptive mode batch size follows the observed bulk requests: it aims at `target_bytes` per request and
+    shrinks when the slowest request of a batch takes longer than `max_seconds`.
+    """
+
+    # Weight of the last observation in the average document size
+    smoothing: ClassVar[float] = 0.5
+
+    # Max batch size growth after a single observation
+    max_growth_factor: ClassVar[float] = 2.0
+
+    def __init__(
+        self,
+        batch_size: int,
+        *,
+        adaptive: bool = False,
+        target_bytes: int = 10 * 1024 * 1024,
+        max_seconds: float = 10.0,
+        min_batch_size: int = 10,
+        max_batch_size: int = 5000,
+    ) -> None:
+        self._batch_size = batch_size
+        self._adaptive = adaptive
+        self._target_bytes = target_bytes
+        self._max_seconds = max_seconds
+        self._min_batch_size = min_batch_size
+        self._max_batch_size = max_batch_size
+        self._document_bytes: float | None = None
+
+    @property
+    def batch_size(self) -> int:
+        """Number of entities in the next batch."""
+        return self._batch_size
+
+    def observe(self, stats: LoadStats) -> None:
+        """Adjust batch size after a batch has been loaded."""
+        if not self._adaptive or not stats.documents:
+            return
+        document_bytes = stats.payload_bytes / stats.documents
+        if self._document_bytes is not None:
+            document_bytes = self.smoothing * document_bytes + (1 - self.smoothing) * self._document_bytes
+        self._document_bytes = document_bytes
+
+        batch_size = self._target_bytes / max(document_bytes, 1)
+        if stats.seconds > self._max_seconds:
+            batch_size = min(batch_size, stats.request_documents * self._max_seconds / stats.seconds)
+        batch_size = min(batch_size, self._batch_size * self.max_growth_factor)
+        self._batch_size = max(self._min_batch_size, min(int(batch_size), self._max_batch_size))
+        logging.debug(
+            "Batch size: %d (%d docs, %d bytes, %.2fs)",
+            self._batch_size, stats.documents, stats.payload_bytes, stats.seconds,
+        )
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import uuid
+from typing import ClassVar, TypeAlias
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Checkpoint:
+    """Keyset checkpoint: `(modified, id)` of the last synced entity."""
+
+    modified: datetime.datetime
+    entity_id: uuid.UUID
+
+    separator: ClassVar[str] = "|"
+
+    @classmethod
+    def initial(cls) -> Checkpoint:
+        """Checkpoint that precedes all entities."""
+        return cls(modified=datetime.datetime.min.replace(tzinfo=datetime.UTC), entity_id=uuid.UUID(int=0))
+
+    @classmethod
+    def deserialize(cls, value: str) -> Checkpoint:
+        """Restore checkpoint from the state storage value."""
+        modified, entity_id = value.split(cls.separator, 1)
+        return cls(modified=datetime.datetime.fromisoformat(modified), entity_id=uuid.UUID(entity_id))
+
+    @classmethod
+    def load(cls, value: str | None) -> Checkpoint:
+        """Restore checkpoint from the state storage value, the initial one if nothing has been synced yet."""
+        return cls.initial() if value is None else cls.deserialize(value)
+
+    def serialize(self) -> str:
+        """Serialize checkpoint for the state storage."""
+        return f"{self.modified.isoformat()}{self.separator}{self.entity_id}"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ChangelogCheckpoint:
+    """Changelog checkpoint: `(txid, seq)` of the last consumed changelog record."""
+
+    txid: int
+    seq: int
+
+    separator: ClassVar[str] = "|"
+
+    @classmethod
+    def initial(cls) -> ChangelogCheckpoint:
+        """Checkpoint that precedes all changelog records."""
+        return cls(txid=0, seq=0)
+
+    @classmethod
+    def deserialize(cls, value: str) -> ChangelogCheckpoint:
+        """Restore checkpoint from the state storage value."""
+        txid, seq = value.split(cls.separator, 1)
+        return cls(txid=int(txid), seq=int(seq))
+
+    @classmethod
+    def load(cls, value: str | None) -> ChangelogCheckpoint:
+        """Restore checkpoint from the state storage value, the initial one if nothing has been consumed yet."""
+        return cls.initial() if value is None else cls.deserialize(value)
+
+    def serialize(self) -> str:
+        """Serialize checkpoint for the state storage."""
+        return f"{self.txid}{self.separator}{self.seq}"
+
+
+AnyCheckpoint: TypeAlias = Checkpoint | ChangelogCheckpoint
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    import uuid
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+
+    from .extractors import SQL
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Dependency:
+    """Dependency of documents on entities of the `entity_type`.
+
+    `sql_affected` resolves IDs of changed entities to IDs of the affected documents. Documents embed a fragment
+    built from the entities: if `sql_fragment` is set, the fragment can be refreshed without rebuilding the whole
+    document, the query selects fragment columns of the documents by their IDs.
+    If `sql_embedded` is set, a changed entity can be updated in place in all documents that embed it (with
+    `update_by_query`), the query selects the entities by their IDs along with `documents_ids` of such documents.
+    """
+
+    entity_type: str
+    sql_affected: SQL
+    sql_fragment: SQL | None = None
+    sql_embedded: SQL | None = None
+
+
+@dataclasses.dataclass(slots=True)
+class RefreshPlan:
+    """Documents to refresh after changes of entities.
+
+    Documents of `full_ids` are rebuilt, only the fragments built from the entities of the given type are refreshed
+    in documents of `fragment_ids`. Entities of `embedded` (rows of `Dependency.sql_embedded` by entity type) are
+    updated in place in all documents that embed them.
+    """
+
+    full_ids: list[uuid.UUID] = dataclasses.field(default_factory=list)
+    fragment_ids: dict[str, list[uuid.UUID]] = dataclasses.field(default_factory=dict)
+    embedded: dict[str, list[Mapping[str, Any]]] = dataclasses.field(default_factory=dict)
+
+
+class DependencyGraph:
+    """Dependencies of documents of the `entity_type` on other entities."""
+
+    def __init__(self, entity_type: str, *dependencies: Dependency) -> None:
+        self.entity_type = entity_type
+        self.dependencies = {dependency.entity_type: dependency for dependency in dependencies}
+
+    @property
+    def entity_types(self) -> list[str]:
+        """Types of entities the documents are built from."""
+        return [self.entity_type, *self.dependencies]
+
+    def plan(
+        self,
+        changes: Mapping[str, Sequence[uuid.UUID]],
+        fetch: Callable[[SQL, Sequence[uuid.UUID]], Iterable[Mapping[str, Any]]],
+        *,
+        embedded_min_documents: int = 0,
+        fragment_updates: bool = True,
+    ) -> RefreshPlan:
+        """Resolve changed entities to the affected documents and choose the cheapest refresh of each document.
+
+        `changes` are IDs of changed entities by type, `fetch` runs a query with a list of IDs and returns the rows.
+        A document is rebuilt if it has changed itself, if a changed entity has no fragment query or if several
+        fragments have changed: a single document query is cheaper than several fragment ones. If `fragment_updates`
+        is false, affected documents are always rebuilt.
+        An entity embedded in at least `embedded_min_documents` documents (`0` - never) is updated in place: a single
+        `update_by_query` is cheaper than loading and sending that many fragments.
+        """
+        plan = RefreshPlan()
+        full_ids: dict[uuid.UUID, None] = dict.fromkeys(changes.get(self.entity_type, ()))
+        fragments: dict[uuid.UUID, set[str]] = {}
+        for entity_type, dependency in self.dependencies.items():
+            if not (entities_ids := changes.get(entity_type)):
+                continue
+            if embedded_min_documents and dependency.sql_embedded is not None:
+                entities_ids = self._plan_embedded(plan, dependency, entities_ids, fetch, embedded_min_documents)
+                if not entities_ids:
+                    continue
+            for row in fetch(dependency.sql_affected, entities_ids):
+                document_id = row["id"]
+                if dependency.sql_fragment is None or not fragment_updates:
+                    full_ids[document_id] = None
+                else:
+                    fragments.setdefault(document_id, set()).add(entity_type)
+
+        for document_id, entity_types in fragments.items():
+            if document_id in full_ids:
+                continue
+            if len(entity_types) > 1:
+                full_ids[document_id] = None
+                continue
+            entity_type, = entity_types
+            plan.fragment_ids.setdefault(entity_type, []).append(document_id)
+        plan.full_ids = list(full_ids)
+        return plan
+
+    @staticmethod
+    def _plan_embedded(
+        plan: RefreshPlan,
+        dependency: Dependency,
+        entities_ids: Sequence[uuid.UUID],
+        fetch: Callable[[SQL, Sequence[uuid.UUID]], Iterable[Mapping[str, Any]]],
+        min_documents: int,
+    ) -> list[uuid.UUID]:
+        """Add entities embedded in at least `min_documents` documents to the plan, return IDs of the other ones."""
+        embedded_ids: set[uuid.UUID] = set()
+        for row in fetch(cast("SQL", dependency.sql_embedded), entities_ids):
+            if len(row["documents_ids"] or ()) >= min_documents:
+                plan.embedded.setdefault(dependency.entity_type, []).append(row)
+                embedded_ids.add(row["id"])
+        return [entity_id for entity_id in entities_ids if entity_id not in embedded_ids]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Sequence
+
+    from elasticsearch import AsyncElasticsearch
+    from psycopg_pool import AsyncConnectionPool
+    from redis.asyncio import Redis as AsyncRedis
+
+    from .aio import AsyncETLPipeline
+    from .pipelines import ETLPipeline, RunReport
+
+PipelineT = TypeVar("PipelineT", "ETLPipeline", "AsyncETLPipeline")
+
+
+class Engine(abc.ABC):
+    """Runs all ETL pipelines once."""
+
+    @property
+    @abc.abstractmethod
+    def source_tables(self) -> set[str]:
+        """Source tables of all pipelines."""
+
+    @abc.abstractmethod
+    def run(self, tables: Collection[str] | None = None) -> list[RunReport]:
+        """Run pipelines, return reports of the successful ones.
+
+        If `tables` are given, only pipelines built from any of these tables are run.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release resources of the engine."""
+
+
+def select_pipelines(pipelines: Sequence[PipelineT], tables: Collection[str] | None) -> list[PipelineT]:
+    """Select pipelines affected by changes of the given tables (all pipelines if tables are unknown)."""
+    if tables is None:
+        return list(pipelines)
+    return [pipeline for pipeline in pipelines if not set(pipeline.extractor.source_tables).isdisjoint(tables)]
+
+
+class ThreadEngine(Engine):
+    """Runs every pipeline in a separate thread."""
+
+    def __init__(self, pipelines: Sequence[ETLPipeline]) -> None:
+        self._pipelines = pipelines
+
+    @property
+    def source_tables(self) -> set[str]:
+        return {table for pipeline in self._pipelines for table in pipeline.extractor.source_tables}
+
+    def run(self, tables: Collection[str] | None = None) -> list[RunReport]:
+        pipelines = select_pipelines(self._pipelines, tables)
+        if not pipelines:
+            return []
+        reports = []
+        with ThreadPoolExecutor(max_workers=len(pipelines), thread_name_prefix="etl") as executor:
+            futures = [executor.submit(pipeline.execute) for pipeline in pipelines]
+        for pipeline, future in zip(pipelines, futures, strict=True):
+            if (exc := future.exception()) is not None:
+                logging.error("Pipeline of the index `%s` failed", pipeline.loader.es_index_name, exc_info=exc)
+                continue
+            reports.append(future.result())
+        return reports
+
+    def close(self) -> None:
+        """Nothing to release: clients are closed along with the container resources."""
+
+
+class AsyncEngine(Engine):
+    """Runs all pipelines concurrently on a single event loop.
+
+    The event loop is kept between runs, so connections of the async clients are reused.
+    """
+
+    def __init__(
+        self,
+        pipelines: Sequence[AsyncETLPipeline],
+        pg_pool: AsyncConnectionPool,
+        elastic_client: AsyncElasticsearch,
+        redis_client: AsyncRedis,
+    ) -> None:
+        self._pipelines = pipelines
+        self._pg_pool = pg_pool
+        self._elastic_client = elastic_client
+        self._redis_client = redis_client
+        self._runner = asyncio.Runner()
+
+    @property
+    def source_tables(self) -> set[str]:
+        return {table for pipeline in self._pipelines for table in pipeline.extractor.source_tables}
+
+    def run(self, tables: Collection[str] | None = None) -> list[RunReport]:
+        return self._runner.run(self._run(select_pipelines(self._pipelines, tables)))
+
+    def close(self) -> None:
+        self._runner.run(self._close())
+        self._runner.close()
+
+    async def _run(self, pipelines: Sequence[AsyncETLPipeline]) -> list[RunReport]:
+        await self._pg_pool.open()
+        results = await asyncio.gather(*(pipeline.execute() for pipeline in pipelines), return_exceptions=True)
+        reports = []
+        for pipeline, result in zip(pipelines, results, strict=True):
+            if isinstance(result, BaseException):
+                logging.error("Pipeline of the index `%s` failed", pipeline.loader.es_index_name, exc_info=result)
+                continue
+            reports.append(result)
+        return reports
+
+    async def _close(self) -> None:
+        await self._pg_pool.close()
+        await self._elastic_client.close()
+        await self._redis_client.close()
@@ -1,133 +1,453 @@
 from __future__ import annotations
 
-import datetime
+import dataclasses
+import functools
 import logging
+import uuid
+from itertools import chain, islice
 from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 import psycopg2
 
+from etl.constants import DELETED_ENTITY_FIELD, EMBEDDED_ENTITY_FIELD, FRAGMENT_ENTITY_FIELD, RAW_ROW_FIELD
+
+from .checkpoints import ChangelogCheckpoint, Checkpoint
+
 if TYPE_CHECKING:
-    from collections.abc import Iterator, Sequence
+    from collections.abc import Callable, Iterator, Sequence
 
     from psycopg2._psycopg import connection
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, RealDictRow
 
-    from etl.infrastructure.db.storage import BaseStorage
+    from etl.infrastructure.db.postgres import PostgresPool
+    from etl.infrastructure.db.storage import BaseStorage, BaseStorageBatch
 
-    from .schemas import PgSchema
+    from .batching import BatchSizer
+    from .checkpoints import AnyCheckpoint
+    from .dependencies import Dependency, DependencyGraph
 
 if TYPE_CHECKING:
     SQL = str
 
 
-class PgExtractor:
-    """Base class for all `data extractors` from Postgres."""
+@dataclasses.dataclass(frozen=True, slots=True)
+class ChangeProbe:
+    """Latest `modified` timestamps of the source tables, `changed_tables` have moved since the last synced run."""
+
+    values: dict[str, str]
+    changed_tables: list[str]
 
-    BATCH_SIZE: ClassVar[int] = 100
 
-    etl_schema_class: ClassVar[type[PgSchema]]
+class PgExtractor:
+    """Base class for all `data extractors` from Postgres.
+
+    Queries, their parameters and checkpoints are built by class methods, which are shared with `AsyncPgExtractor`.
+    """
 
     # Keys in a state storage
-    etl_timestamp_key: ClassVar[str]
-    etl_loaded_entities_ids_key: ClassVar[str]
+    etl_checkpoint_key: ClassVar[str]
+    etl_rebuild_checkpoint_key: ClassVar[str]
+    etl_changelog_checkpoint_key: ClassVar[str]
+    etl_leader_key: ClassVar[str]
+    etl_change_probe_key: ClassVar[str]
+
+    # Tables the documents are built from, their changes are announced to the `LISTEN/NOTIFY` channels of the same name
+    source_tables: ClassVar[tuple[str, ...]] = ()
 
     # SQL queries
     sql_all_entities: ClassVar[SQL]
     sql_entities_to_sync: ClassVar[SQL]
 
+    # Latest `modified` of the source tables scanned by `sql_entities_to_sync`, a single row with a column per table:
+    # if none of them has moved since the last synced run, there is nothing to sync
+    sql_change_probe: ClassVar[SQL | None] = None
+
+    # IDs of entities in the `[start, stop]` range after the `after` one (if it is not null), in the ID order
+    sql_entities_in_range: ClassVar[SQL]
+
+    # Same as `sql_all_entities`, but renders the whole document `_source` as JSON text in the `es_source` column
+    sql_all_entities_json: ClassVar[SQL | None] = None
+
+    # Changelog records of committed transactions (see `sql/changelog.sql`), in the `(txid, seq)` order
+    sql_changelog: ClassVar[SQL] = """
+        SELECT
+            c.txid, c.seq, c.entity_type, c.entity_id
+        FROM content.etl_changelog AS c
+        WHERE
+            (c.txid, c.seq) > (%(txid)s, %(seq)s)
+            AND c.txid < txid_snapshot_xmin(txid_current_snapshot())
+            AND c.entity_type = ANY(%(entity_types)s)
+        ORDER BY c.txid, c.seq
+        LIMIT %(limit)s
+    """
+
+    # Number of changelog records of committed transactions after the checkpoint
+    sql_changelog_backlog: ClassVar[SQL] = """
+        SELECT
+            count(*) AS backlog
+        FROM content.etl_changelog AS c
+        WHERE
+            (c.txid, c.seq) > (%(txid)s, %(seq)s)
+            AND c.txid < txid_snapshot_xmin(txid_current_snapshot())
+            AND c.entity_type = ANY(%(entity_types)s)
+    """
+
+    # Entities the documents are built from, changes found in the changelog are resolved to documents with it
+    dependency_graph: ClassVar[DependencyGraph]
+
     # queries config
     entities_to_select_params: ClassVar[list | None] = None
-    entity_exclude_time_stamp_param: ClassVar[str] = "time_stamp"
-    entity_exclude_field: ClassVar[str] = "id"
     entity_id_field: ClassVar[str] = "id"
+    entity_modified_field: ClassVar[str] = "modified"
 
-    def __init__(self, pg_conn: connection, storage: BaseStorage) -> None:
-        self._pg_conn = pg_conn
+    def __init__(
+        self,
+        pg_pool: PostgresPool,
+        storage: BaseStorage,
+        batch_sizer: BatchSizer,
+        *,
+        server_side_cursors: bool = True,
+        cursor_itersize: int = 2000,
+        raw_json_documents: bool = False,
+        raw_rows: bool = False,
+        changelog: bool = False,
+        embedded_min_documents: int = 0,
+        partial_updates: bool = True,
+        change_probe: bool = False,
+    ) -> None:
+        self._pg_pool = pg_pool
         self._storage = storage
+        self._batch_sizer = batch_sizer
+        self._server_side_cursors = server_side_cursors
+        self._cursor_itersize = cursor_itersize
+        self._raw_json_documents = raw_json_documents
+        self._raw_rows = raw_rows
+        self._changelog = changelog
+        self._embedded_min_documents = embedded_min_documents
+        self._partial_updates = partial_updates
+        self._change_probe = change_probe
+
+    @property
+    def checkpoint_key(self) -> str:
+        """Key of the checkpoint of incremental runs."""
+        if self._changelog:
+            return self.etl_changelog_checkpoint_key
+        return self.etl_checkpoint_key
+
+    @property
+    def probes_changes(self) -> bool:
+        """Whether incremental runs are skipped unless the change probe has moved.
+
+        The changelog mode has no need of the probe: the changelog query is as cheap.
+        """
+        return self._change_probe and not self._changelog and self.sql_change_probe is not None
+
+    def probe_changes(self) -> ChangeProbe:
+        """Run the change probe and compare it with the one of the last synced run."""
+        with self._pg_pool.checkout() as pg_conn:
+            row, = chain.from_iterable(self.load_data(pg_conn, cast("SQL", self.sql_change_probe)))
+        values = self.get_change_probe_values(row)
+        saved_values = self._storage.retrieve_map_values(self.etl_change_probe_key, *values)
+        return self.make_change_probe(values, saved_values)
+
+    @staticmethod
+    def get_change_probe_values(row: dict[str, Any]) -> dict[str, str]:
+        """Get the latest `modified` timestamps of the source tables from the row of the change probe query."""
+        return {table: "" if modified is None else modified.isoformat() for table, modified in row.items()}
+
+    @staticmethod
+    def make_change_probe(values: dict[str, str], saved_values: Sequence[Any]) -> ChangeProbe:
+        """Compare the change probe with the saved one of the last synced run."""
+        changed_tables = [
+            table
+            for (table, value), saved_value in zip(values.items(), saved_values, strict=True)
+            if value != saved_value
+        ]
+        return ChangeProbe(values=values, changed_tables=changed_tables)
+
+    def save_change_probe(self, probe: ChangeProbe, state: BaseStorageBatch) -> None:
+        """Save the change probe once the changes found after it have been synced."""
+        state.save_map(self.etl_change_probe_key, probe.values)
+
+    def extract(self, checkpoint: AnyCheckpoint | None = None) -> Iterator[tuple[list[RealDictRow], AnyCheckpoint]]:
+        """Primary method of extracting data from Postgres.
+
+        Entities are extracted starting from the given `checkpoint` (the saved one by default). Every batch is paired
+        with the checkpoint that should be saved once the batch is loaded. In the changelog mode changed entities are
+        found by the changelog records instead of `modified` timestamps.
+
+        A connection is checked out from the pool for the whole extraction.
+        """
+        if checkpoint is None:
+            checkpoint = self.get_changelog_checkpoint() if self._changelog else self.get_checkpoint()
+        with self._pg_pool.checkout() as pg_conn:
+            if isinstance(checkpoint, ChangelogCheckpoint):
+                yield from self.load_changelog_batches(pg_conn, checkpoint)
+            else:
+                yield from self.load_batches(pg_conn, checkpoint)
+
+    def count_backlog(self) -> int:
+        """Count changes after the saved checkpoint: changed entities, or changelog records in the changelog mode.
+
+        Costs about as much as finding the changes, so it is meant for deciding on how to load them.
+        """
+        params: dict[str, Any]
+        if self._changelog:
+            checkpoint = self.get_changelog_checkpoint()
+            sql = self.sql_changelog_backlog
+            params = {
+                "txid": checkpoint.txid, "seq": checkpoint.seq, "entity_types": self.dependency_graph.entity_types,
+            }
+        else:
+            # The query is built from the class constant, there is no user input in it
+            sql = f"SELECT count(*) AS backlog FROM ({self.sql_entities_to_sync}) AS entities"  # noqa: S608
+            params = self.get_sync_params(self.get_checkpoint())
+        with self._pg_pool.checkout() as pg_conn:
+            row, = chain.from_iterable(self.load_data(pg_conn, sql, params))
+        return int(row["backlog"])
+
+    def extract_range(
+        self, start: uuid.UUID, stop: uuid.UUID, after: uuid.UUID | None = None,
+    ) -> Iterator[tuple[list[RealDictRow], uuid.UUID]]:
+        """Extract batches of all entities with IDs in the `[start, stop]` range, in the ID order.
+
+        Extraction starts after the `after` entity if it is given. Every batch is paired with the ID of its last
+        entity, rows of entities deleted in the meantime are marked with `DELETED_ENTITY_FIELD`.
+        """
+        sql = self.get_data_query()
+        with self._pg_pool.checkout() as pg_conn:
+            while True:
+                params = {"start": start, "stop": stop, "after": after, "limit": self._batch_sizer.batch_size}
+                entities_ids = [
+                    row[self.entity_id_field]
+                    for row in chain.from_iterable(self.load_data(pg_conn, self.sql_entities_in_range, params))
+                ]
+                if not entities_ids:
+                    return
+                after = last_entity_id = entities_ids[-1]
+                yield self.load_changed_entities(pg_conn, sql, entities_ids), last_entity_id
+
+    def load_batches(
+        self, pg_conn: connection, checkpoint: Checkpoint,
+    ) -> Iterator[tuple[list[RealDictRow], Checkpoint]]:
+        """Load batches of data from Postgres.
 
-    def extract(self) -> Iterator[list[PgSchema]]:
-        """Primary method of extracting data from Postgres."""
-        yield from self.load_batches()
-
-    def load_batches(self) -> Iterator[list[PgSchema]]:
-        """Load batches of data from Postgres."""
-        entities_ids = self.get_entities_ids_to_update()
-
-        params = [entities_ids]
-        if self.entities_to_select_params is not None:
-            params.extend(self.entities_to_select_params)
-
-        batches = self.load_data(self.sql_all_entities, self.etl_schema_class, params=params)
-        yield from batches
-
-    def get_entities_ids_to_update(self) -> Sequence[str] | tuple[None]:
-        """Get list of entities ids for ETL pipeline."""
-        sql, params = self.get_sql_with_excluded_entities(initial_sql=self.sql_entities_to_sync)
-        with cast("RealDictCursor", self._pg_conn.cursor()) as cursor:
-            cursor.execute(query=sql, vars=params)
-            entities_ids = tuple([row[self.entity_id_field] for row in cursor.fetchall()])
-            if not len(entities_ids):
-                return (None,)
-            return entities_ids
-
-    def get_sql_with_excluded_entities(self, initial_sql: SQL) -> tuple[SQL, dict]:
-        """Get data for configuring SQL query with excluded entities."""
-        loaded_entities_ids = self.get_loaded_entities_ids()
-        if loaded_entities_ids:
-            initial_sql += f"""
-            AND {self.entity_exclude_field} NOT IN %(loaded_entities)s
-            """
+        Changed entities are processed in chunks of `batch_size` IDs, so the query size does not depend on the
+        number of entities to sync. Each chunk makes up a single batch.
+        """
+        sql = self.get_data_query()
+        for entities in self.get_entities_to_update(pg_conn, checkpoint):
+            params = self.get_data_params([entity[self.entity_id_field] for entity in entities])
+            batch = list(chain.from_iterable(self.load_data(pg_conn, sql, params)))
+            yield batch, self.get_batch_checkpoint(entities)
+
+    def load_changelog_batches(
+        self, pg_conn: connection, checkpoint: ChangelogCheckpoint,
+    ) -> Iterator[tuple[list[RealDictRow], ChangelogCheckpoint]]:
+        """Load batches of documents affected by the changelog records after the `checkpoint`.
+
+        Records are read in chunks of `batch_size`. Affected documents are loaded in batches of `batch_size` IDs:
+        whole documents first, then documents that need only a fragment to be refreshed. Entities embedded in many
+        documents come last, in batches of `batch_size` entities: they are updated in place in all such documents.
+        Without `partial_updates` (they cannot be fenced by versions), all affected documents are rebuilt.
+        Only the last batch of a chunk moves the checkpoint past the chunk.
+        """
+        sql = self.get_data_query()
+        while records := self.get_changelog_records(pg_conn, checkpoint):
+            plan = self.dependency_graph.plan(
+                self.group_changelog_records(records),
+                functools.partial(self.fetch_by_ids, pg_conn),
+                embedded_min_documents=self._embedded_min_documents if self._partial_updates else 0,
+                fragment_updates=self._partial_updates,
+            )
+            batches: list[Callable[[], list[RealDictRow]]] = [
+                functools.partial(self.load_changed_entities, pg_conn, sql, chunk)
+                for chunk in self._chunk_ids(plan.full_ids)
+            ]
+            for entity_type, documents_ids in plan.fragment_ids.items():
+                dependency = self.dependency_graph.dependencies[entity_type]
+                batches.extend(
+                    functools.partial(self.load_fragments, pg_conn, dependency, chunk)
+                    for chunk in self._chunk_ids(documents_ids)
+                )
+            for entity_type, rows in plan.embedded.items():
+                batches.extend(
+                    functools.partial(self.mark_rows, rows[start:start + self._batch_sizer.batch_size], entity_type)
+                    for start in range(0, len(rows), self._batch_sizer.batch_size)
+                )
+            for load_batch in batches[:-1]:
+                yield load_batch(), checkpoint
+            last_record = records[-1]
+            checkpoint = ChangelogCheckpoint(txid=last_record["txid"], seq=last_record["seq"])
+            yield batches[-1]() if batches else [], checkpoint
+
+    def get_changelog_records(self, pg_conn: connection, checkpoint: ChangelogCheckpoint) -> list[RealDictRow]:
+        """Get up to `batch_size` changelog records after the `checkpoint` that affect the documents."""
         params = {
-            "loaded_entities": loaded_entities_ids,
-            self.entity_exclude_time_stamp_param: self.get_etl_timestamp(),
+            "txid": checkpoint.txid,
+            "seq": checkpoint.seq,
+            "entity_types": self.dependency_graph.entity_types,
+            "limit": self._batch_sizer.batch_size,
         }
-        return initial_sql, params
-
-    def get_loaded_entities_ids(self) -> tuple[str, ...] | None:
-        """Get IDs of entities that have been already synced and will not be used in the ETL pipeline."""
-        loaded_entities_ids = self._storage.retrieve_list(self.etl_loaded_entities_ids_key)
-        if not loaded_entities_ids:
-            return None
-        return tuple(loaded_entities_ids)
-
-    def get_etl_timestamp(self) -> datetime.datetime:
-        """Get timestamp of the last entity's sync."""
-        timestamp = self._storage.retrieve(self.etl_timestamp_key)
-        if timestamp is None:
-            return datetime.datetime.min
-        return datetime.datetime.fromtimestamp(int(timestamp), tz=datetime.UTC)
+        return list(chain.from_iterable(self.load_data(pg_conn, self.sql_changelog, params)))
+
+    @staticmethod
+    def group_changelog_records(records: Sequence[RealDictRow]) -> dict[str, list[uuid.UUID]]:
+        """Get unique IDs of the changed entities by entity type, in the order of records."""
+        changed_ids: dict[str, dict[uuid.UUID, None]] = {}
+        for record in records:
+            changed_ids.setdefault(record["entity_type"], {})[record["entity_id"]] = None
+        return {entity_type: list(ids) for entity_type, ids in changed_ids.items()}
+
+    def fetch_by_ids(self, pg_conn: connection, sql: SQL, ids: Sequence[uuid.UUID]) -> Iterator[RealDictRow]:
+        """Run a query with the list of IDs as its only parameter."""
+        for rows in self.load_data(pg_conn, sql, [list(ids)]):
+            yield from rows
+
+    @staticmethod
+    def mark_rows(rows: Sequence[Any], entity_type: str) -> list[RealDictRow]:
+        """Mark rows of entities embedded in documents with `EMBEDDED_ENTITY_FIELD`."""
+        return [cast("RealDictRow", {**row, EMBEDDED_ENTITY_FIELD: entity_type}) for row in rows]
+
+    def load_changed_entities(self, pg_conn: connection, sql: SQL, entities_ids: list[uuid.UUID]) -> list[RealDictRow]:
+        """Load data of the given entities, add `{id, DELETED_ENTITY_FIELD: True}` rows of the deleted ones."""
+        batch = list(chain.from_iterable(self.load_data(pg_conn, sql, self.get_data_params(entities_ids))))
+        found_ids = {row[self.entity_id_field] for row in batch}
+        batch.extend(
+            cast("RealDictRow", {self.entity_id_field: entity_id, DELETED_ENTITY_FIELD: True})
+            for entity_id in entities_ids
+            if entity_id not in found_ids
+        )
+        return batch
+
+    def load_fragments(
+        self, pg_conn: connection, dependency: Dependency, documents_ids: list[uuid.UUID],
+    ) -> list[RealDictRow]:
+        """Load fragments of the given documents built from the entities of the `dependency`.
+
+        Rows are marked with `FRAGMENT_ENTITY_FIELD`, documents that no longer exist are skipped.
+        """
+        sql = cast("SQL", dependency.sql_fragment)
+        batch = list(chain.from_iterable(self.load_data(pg_conn, sql, [documents_ids])))
+        for row in batch:
+            row[FRAGMENT_ENTITY_FIELD] = dependency.entity_type
+        return batch
+
+    def _chunk_ids(self, ids: list[uuid.UUID]) -> list[list[uuid.UUID]]:
+        batch_size = self._batch_sizer.batch_size
+        return [ids[start:start + batch_size] for start in range(0, len(ids), batch_size)]
+
+    def get_entities_to_update(self, pg_conn: connection, checkpoint: Checkpoint) -> Iterator[list[RealDictRow]]:
+        """Get chunks of `(id, modified)` of entities that have changed after the `checkpoint`.
+
+        `sql_entities_to_sync` must return entities ordered by `(modified, id)`.
+        """
+        cursor = self._get_cursor(pg_conn)
+        try:
+            cursor.execute(query=self.sql_entities_to_sync, vars=self.get_sync_params(checkpoint))
+            rows = iter(cursor)
+            while chunk := list(islice(rows, self._batch_sizer.batch_size)):
+                yield chunk
+        finally:
+            cursor.close()
+
+    def get_data_query(self) -> SQL:
+        """Get query for the data of changed entities."""
+        return self.select_data_query(raw_json_documents=self._raw_json_documents, raw_rows=self._raw_rows)
+
+    @classmethod
+    def select_data_query(cls, *, raw_json_documents: bool, raw_rows: bool = False) -> SQL:
+        """Select query for the data of changed entities.
+
+        In the raw JSON mode documents are rendered by Postgres and passed to Elasticsearch without parsing. With
+        `raw_rows`, every row is rendered as JSON text in the `RAW_ROW_FIELD` column along with the entity ID, so that
+        it is decoded by a transform pool worker instead of the ETL process.
+        """
+        if raw_json_documents and cls.sql_all_entities_json is not None:
+            return cls.sql_all_entities_json
+        if raw_rows:
+            # The query is built from the class constants, there is no user input in it
+            return (
+                f"SELECT e.{cls.entity_id_field}, row_to_json(e)::text AS {RAW_ROW_FIELD}"  # noqa: S608
+                f" FROM ({cls.sql_all_entities}) AS e"
+            )
+        return cls.sql_all_entities
+
+    @classmethod
+    def get_data_params(cls, entities_ids: list[uuid.UUID]) -> list[Any]:
+        """Get parameters of the query for the data of the given entities."""
+        params: list[Any] = [entities_ids]
+        if cls.entities_to_select_params is not None:
+            params.extend(cls.entities_to_select_params)
+        return params
+
+    @staticmethod
+    def get_sync_params(checkpoint: Checkpoint) -> dict[str, Any]:
+        """Get parameters of `sql_entities_to_sync`."""
+        return {"modified": checkpoint.modified, "id": checkpoint.entity_id}
+
+    @classmethod
+    def get_batch_checkpoint(cls, entities: Sequence[Any]) -> Checkpoint:
+        """Get checkpoint to save once the batch of the given `(id, modified)` entities is loaded."""
+        last_entity = entities[-1]
+        return Checkpoint(modified=last_entity[cls.entity_modified_field], entity_id=last_entity[cls.entity_id_field])
+
+    @classmethod
+    def get_cursor_name(cls) -> str:
+        """Get a unique name of a server-side cursor."""
+        return f"{cls.__name__.lower()}_{uuid.uuid4().hex}"
+
+    def get_checkpoint(self, key: str | None = None) -> Checkpoint:
+        """Get checkpoint of the last synced entity."""
+        return Checkpoint.load(self._storage.retrieve(key or self.etl_checkpoint_key))
+
+    def get_changelog_checkpoint(self) -> ChangelogCheckpoint:
+        """Get checkpoint of the last consumed changelog record."""
+        return ChangelogCheckpoint.load(self._storage.retrieve(self.etl_changelog_checkpoint_key))
 
     def load_data(
-        self, sql: SQL, schema_class: type[PgSchema], params: Sequence[Any] | None = None,
-    ) -> Iterator[list[PgSchema]]:
-        """Fetch data using given `params` and `sql`."""
-        yield from self._load_data(sql, schema_class, params)
-
-    def _get_paginated_results(self, cursor: RealDictCursor, schema_class: type[PgSchema]) -> Iterator[list[PgSchema]]:
-        """Fetch data from Postgres in `BATCH_SIZE` batches."""
-        data: list[PgSchema] = []
-        while True:
-            results = cursor.fetchmany(self.BATCH_SIZE)
-            if not results:
-                break
-            for row in results:
-                data.append(schema_class.from_dict(row))
-            yield data
-            data = []
+        self, pg_conn: connection, sql: SQL, params: Sequence[Any] | dict[str, Any] | None = None,
+    ) -> Iterator[list[RealDictRow]]:
+        """Fetch data using given `params` and `sql`.
+
+        Rows are passed on as is, documents are built from them by the transformer.
+        """
+        yield from self._load_data(pg_conn, sql, params)
+
+    def _get_paginated_results(self, cursor: RealDictCursor) -> Iterator[list[RealDictRow]]:
+        """Fetch data from Postgres in `batch_size` batches.
+
+        Rows are read lazily, so a server-side cursor keeps at most `itersize` rows in memory.
+        """
+        rows = iter(cursor)
+        while results := list(islice(rows, self._batch_sizer.batch_size)):
+            yield results
 
     def _load_data(
-        self, sql: SQL, schema_class: type[PgSchema], params: Sequence[Any] | None = None,
-    ) -> Iterator[list[PgSchema]]:
+        self, pg_conn: connection, sql: SQL, params: Sequence[Any] | dict[str, Any] | None = None,
+    ) -> Iterator[list[RealDictRow]]:
         """Fetch paginated data from Postgres."""
         if params is None:
             params = []
-        cursor = cast("RealDictCursor", self._pg_conn.cursor())
+        cursor = self._get_cursor(pg_conn)
         try:
             cursor.execute(sql, vars=params)
         except psycopg2.OperationalError as exc:
             logging.error("Postgres operational error. Exception: `%s`", exc)
             raise
         else:
-            yield from self._get_paginated_results(cursor, schema_class)
+            yield from self._get_paginated_results(cursor)
         finally:
-            cursor.close()  # type: ignore[no-untyped-call]
+            cursor.close()
+
+    def _get_cursor(self, pg_conn: connection) -> RealDictCursor:
+        """Open a cursor for reading query results.
+
+        Named (server-side) cursors stream results from Postgres in `itersize` chunks instead of pulling the whole
+        result set into the process memory.
+        """
+        if not self._server_side_cursors:
+            return cast("RealDictCursor", pg_conn.cursor())
+        cursor = cast("RealDictCursor", pg_conn.cursor(name=self.get_cursor_name()))
+        cursor.itersize = self._cursor_itersize
+        return cursor
@@ -1,7 +1,28 @@
 from typing import Final
 
-# The name of the key in the `State` service, which stores values of the last pipeline launches
-ETL_FILMWORK_LOADED_IDS_KEY: Final[str] = "filmwork:last_ids"
+# The name of the key in the `State` service, which stores the checkpoint of the last synced entity
+ETL_FILMWORK_CHECKPOINT_KEY: Final[str] = "filmwork:checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the index rebuild
+ETL_FILMWORK_REBUILD_CHECKPOINT_KEY: Final[str] = "filmwork:rebuild_checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the last consumed changelog record
+ETL_FILMWORK_CHANGELOG_CHECKPOINT_KEY: Final[str] = "filmwork:changelog_checkpoint"
+
+# The name of the key in the `State` service, which stores the name of the index version being rebuilt
+ETL_FILMWORK_REBUILD_INDEX_KEY: Final[str] = "filmwork:rebuild_index"
+
+# The name of the key in the `State` service, which stores digests of the loaded documents
+ETL_FILMWORK_HASHES_KEY: Final[str] = "filmwork:hashes"
+
+# The name of the key in the `State` service, which stores index settings replaced by the bulk ingest profile
+ETL_FILMWORK_INGEST_SETTINGS_KEY: Final[str] = "filmwork:ingest_settings"
+
+# The name of the key in the `State` service, which stores the leader lease of the pipeline
+ETL_FILMWORK_LEADER_KEY: Final[str] = "filmwork:leader"
+
+# The name of the key in the `State` service, which stores the change probe of the last synced run
+ETL_FILMWORK_CHANGE_PROBE_KEY: Final[str] = "filmwork:change_probe"
 
 # Index name in Elasticsearch
 ETL_FILMWORK_INDEX_NAME: Final[str] = "movies"
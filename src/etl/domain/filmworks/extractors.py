@@ -1,16 +1,24 @@
+from etl.domain.dependencies import Dependency, DependencyGraph
 from etl.domain.extractors import PgExtractor
 
-from .constants import ETL_FILMWORK_LOADED_IDS_KEY
-from .schemas import MovieDetail
+from .constants import (
+    ETL_FILMWORK_CHANGE_PROBE_KEY, ETL_FILMWORK_CHANGELOG_CHECKPOINT_KEY, ETL_FILMWORK_CHECKPOINT_KEY,
+    ETL_FILMWORK_LEADER_KEY, ETL_FILMWORK_REBUILD_CHECKPOINT_KEY,
+)
 
 
 class FilmworkExtractor(PgExtractor):
     """Movies `Extractor`."""
 
-    etl_schema_class = MovieDetail
+    etl_checkpoint_key = ETL_FILMWORK_CHECKPOINT_KEY
+    etl_rebuild_checkpoint_key = ETL_FILMWORK_REBUILD_CHECKPOINT_KEY
+    etl_changelog_checkpoint_key = ETL_FILMWORK_CHANGELOG_CHECKPOINT_KEY
+    etl_leader_key = ETL_FILMWORK_LEADER_KEY
+    etl_change_probe_key = ETL_FILMWORK_CHANGE_PROBE_KEY
 
-    etl_timestamp_key = "filmwork:last_run_at"
-    etl_loaded_entities_ids_key = ETL_FILMWORK_LOADED_IDS_KEY
+    source_tables = (
+        "content.film_work", "content.genre_film_work", "content.genre", "content.person_film_work", "content.person",
+    )
 
     sql_all_entities = """
         SELECT
@@ -37,19 +45,177 @@ class FilmworkExtractor(PgExtractor):
         LEFT OUTER JOIN content.genre g on g.id = gfw.genre_id
         LEFT OUTER JOIN content.person_film_work pfw on fw.id = pfw.film_work_id
         LEFT OUTER JOIN content.person p on p.id = pfw.person_id
-        WHERE fw.id IN %s
+        WHERE fw.id = ANY(%s)
         GROUP BY fw.id
     """
-    sql_entities_to_sync = """
+    sql_all_entities_json = """
         SELECT
-            DISTINCT fw.id
+            fw.id,
+            jsonb_build_object(
+                'uuid', fw.id,
+                'access_type', fw.access_type,
+                'imdb_rating', fw.rating,
+                'title', fw.title,
+                'description', fw.description,
+                'age_rating', fw.age_rating,
+                'release_date', fw.release_date,
+                'genres_names', coalesce(to_jsonb(array_agg(DISTINCT g.name)), '[]'::jsonb),
+                'actors_names', coalesce(
+                    to_jsonb(array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'actor')), '[]'::jsonb
+                ),
+                'writers_names', coalesce(
+                    to_jsonb(array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'writer')), '[]'::jsonb
+                ),
+                'directors_names', coalesce(
+                    to_jsonb(array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'director')), '[]'::jsonb
+                ),
+                'genre', coalesce(
+                    jsonb_agg(DISTINCT jsonb_build_object('uuid', g.id, 'name', g.name)), '[]'::jsonb
+                ),
+                'actors', coalesce(
+                    jsonb_agg(
+                        DISTINCT jsonb_build_object('uuid', p.id, 'full_name', p.full_name))
+                        FILTER (WHERE pfw.role = 'actor'
+                    ),
+                    '[]'::jsonb
+                ),
+                'writers', coalesce(
+                    jsonb_agg(
+                        DISTINCT jsonb_build_object('uuid', p.id, 'full_name', p.full_name))
+                        FILTER (WHERE pfw.role = 'writer'
+                    ),
+                    '[]'::jsonb
+                ),
+                'directors', coalesce(
+                    jsonb_agg(
+                        DISTINCT jsonb_build_object('uuid', p.id, 'full_name', p.full_name))
+                        FILTER (WHERE pfw.role = 'director'
+                    ),
+                    '[]'::jsonb
+                )
+            )::text AS es_source
         FROM content.film_work as fw
         LEFT OUTER JOIN content.genre_film_work gfw on fw.id = gfw.film_work_id
         LEFT OUTER JOIN content.genre g on g.id = gfw.genre_id
         LEFT OUTER JOIN content.person_film_work pfw on fw.id = pfw.film_work_id
         LEFT OUTER JOIN content.person p on p.id = pfw.person_id
+        WHERE fw.id = ANY(%s)
+        GROUP BY fw.id
+    """
+    # Changed movies are found by range scans of every source table on its `modified`, only they are aggregated
+    sql_entities_to_sync = """
+        WITH changed_film_work AS (
+            SELECT fw.id FROM content.film_work AS fw WHERE (fw.modified, fw.id) > (%(modified)s, %(id)s)
+            UNION
+            SELECT gfw.film_work_id AS id
+            FROM content.genre AS g
+            JOIN content.genre_film_work gfw on gfw.genre_id = g.id
+            WHERE g.modified >= %(modified)s
+            UNION
+            SELECT pfw.film_work_id AS id
+            FROM content.person AS p
+            JOIN content.person_film_work pfw on pfw.person_id = p.id
+            WHERE p.modified >= %(modified)s
+        )
+        SELECT
+            fw.id, greatest(fw.modified, max(g.modified), max(p.modified)) AS modified
+        FROM changed_film_work AS cfw
+        JOIN content.film_work fw on fw.id = cfw.id
+        LEFT OUTER JOIN content.genre_film_work gfw on fw.id = gfw.film_work_id
+        LEFT OUTER JOIN content.genre g on g.id = gfw.genre_id
+        LEFT OUTER JOIN content.person_film_work pfw on fw.id = pfw.film_work_id
+        LEFT OUTER JOIN content.person p on p.id = pfw.person_id
+        GROUP BY fw.id
+        HAVING (greatest(fw.modified, max(g.modified), max(p.modified)), fw.id) > (%(modified)s, %(id)s)
+        ORDER BY modified, fw.id
+    """
+    sql_change_probe = """
+        SELECT
+            (SELECT max(fw.modified) FROM content.film_work AS fw) AS "content.film_work",
+            (SELECT max(g.modified) FROM content.genre AS g) AS "content.genre",
+            (SELECT max(p.modified) FROM content.person AS p) AS "content.person"
+    """
+    sql_entities_in_range = """
+        SELECT
+            fw.id
+        FROM content.film_work AS fw
         WHERE
-            (fw.modified > %(time_stamp)s OR g.modified > %(time_stamp)s OR p.modified > %(time_stamp)s)
+            fw.id BETWEEN %(start)s AND %(stop)s
+            AND (%(after)s::uuid IS NULL OR fw.id > %(after)s)
+        ORDER BY fw.id
+        LIMIT %(limit)s
     """
-
-    entity_exclude_field = "fw.id"
+    dependency_graph = DependencyGraph(
+        "film_work",
+        Dependency(
+            "genre",
+            sql_affected="""
+                SELECT DISTINCT
+                    gfw.film_work_id AS id
+                FROM content.genre_film_work AS gfw
+                WHERE gfw.genre_id = ANY(%s)
+            """,
+            sql_fragment="""
+                SELECT
+                    fw.id,
+                    array_agg(DISTINCT g.name) AS genres_names,
+                    json_agg(DISTINCT jsonb_build_object('id', g.id, 'name', g.name)) AS genre
+                FROM content.film_work as fw
+                LEFT OUTER JOIN content.genre_film_work gfw on fw.id = gfw.film_work_id
+                LEFT OUTER JOIN content.genre g on g.id = gfw.genre_id
+                WHERE fw.id = ANY(%s)
+                GROUP BY fw.id
+            """,
+            sql_embedded="""
+                SELECT
+                    g.id, g.name,
+                    array_agg(DISTINCT gfw.film_work_id) FILTER (WHERE gfw.film_work_id IS NOT NULL) AS documents_ids
+                FROM content.genre AS g
+                LEFT JOIN content.genre_film_work gfw on gfw.genre_id = g.id
+                WHERE g.id = ANY(%s)
+                GROUP BY g.id
+            """,
+        ),
+        Dependency(
+            "person",
+            sql_affected="""
+                SELECT DISTINCT
+                    pfw.film_work_id AS id
+                FROM content.person_film_work AS pfw
+                WHERE pfw.person_id = ANY(%s)
+            """,
+            sql_fragment="""
+                SELECT
+                    fw.id,
+                    array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'director') AS directors_names,
+                    array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'actor') AS actors_names,
+                    array_agg(DISTINCT p.full_name) FILTER (WHERE pfw.role = 'writer') AS writers_names,
+                    json_agg(
+                        DISTINCT jsonb_build_object('id', p.id, 'name', p.full_name))
+                        FILTER (WHERE pfw.role = 'actor'
+                    ) AS actors,
+                    json_agg(
+                        DISTINCT jsonb_build_object('id', p.id, 'name', p.full_name))
+                        FILTER (WHERE pfw.role = 'writer'
+                    ) AS writers,
+                    json_agg(
+                        DISTINCT jsonb_build_object('id', p.id, 'name', p.full_name))
+                        FILTER (WHERE pfw.role = 'director'
+                    ) AS directors
+                FROM content.film_work as fw
+                LEFT OUTER JOIN content.person_film_work pfw on fw.id = pfw.film_work_id
+                LEFT OUTER JOIN content.person p on p.id = pfw.person_id
+                WHERE fw.id = ANY(%s)
+                GROUP BY fw.id
+            """,
+            sql_embedded="""
+                SELECT
+                    p.id, p.full_name AS name,
+                    array_agg(DISTINCT pfw.film_work_id) FILTER (WHERE pfw.film_work_id IS NOT NULL) AS documents_ids
+                FROM content.person AS p
+                LEFT JOIN content.person_film_work pfw on pfw.person_id = p.id
+                WHERE p.id = ANY(%s)
+                GROUP BY p.id
+            """,
+        ),
+    )
@@ -1,12 +1,16 @@
-from etl.domain.loaders import ElasticLoader
+from etl.domain.loaders import ElasticLoader, ScriptedUpdate
 
-from .constants import ETL_FILMWORK_INDEX_NAME, ETL_FILMWORK_LOADED_IDS_KEY
+from .constants import (
+    ETL_FILMWORK_HASHES_KEY, ETL_FILMWORK_INDEX_NAME, ETL_FILMWORK_INGEST_SETTINGS_KEY, ETL_FILMWORK_REBUILD_INDEX_KEY,
+)
 
 
 class FilmworkLoader(ElasticLoader):
     """Movies `Loader`."""
 
-    etl_loaded_entities_ids_key = ETL_FILMWORK_LOADED_IDS_KEY
+    etl_ingest_settings_key = ETL_FILMWORK_INGEST_SETTINGS_KEY
+    etl_rebuild_index_key = ETL_FILMWORK_REBUILD_INDEX_KEY
+    etl_hashes_key = ETL_FILMWORK_HASHES_KEY
 
     es_index = {
         "settings": {
@@ -157,3 +161,71 @@ class FilmworkLoader(ElasticLoader):
         },
     }
     es_index_name = ETL_FILMWORK_INDEX_NAME
+
+    # Replaces the entity in the `params.lists` of embedded entities and renames it in the lists of their names in
+    # place, a name that is not listed yet is appended. Names are not re-sorted: Painless can't sort them by the
+    # Postgres collation of `array_agg(DISTINCT ...)`, so a patched list may be ordered differently from a rebuilt one
+    # (the lists are only searched, their order is not relied upon)
+    es_embedded_list_script = """
+        boolean changed = false;
+        String name_field = params.name_field;
+        for (entry in params.lists.entrySet()) {
+            List entities = ctx._source[entry.getKey()];
+            if (entities == null) {
+                continue;
+            }
+            boolean replaced = false;
+            def old_name = null;
+            for (Map entity : entities) {
+                if (entity.uuid == params.entity.uuid && !entity.equals(params.entity)) {
+                    old_name = entity[name_field];
+                    entity.putAll(params.entity);
+                    replaced = true;
+                }
+            }
+            def new_name = params.entity[name_field];
+            if (!replaced || old_name == new_name) {
+                changed = changed || replaced;
+                continue;
+            }
+            changed = true;
+            boolean old_name_used = false;
+            for (Map entity : entities) {
+                if (entity[name_field] == old_name) {
+                    old_name_used = true;
+                }
+            }
+            List names = ctx._source[entry.getValue()];
+            if (names == null) {
+                names = new ArrayList();
+                ctx._source[entry.getValue()] = names;
+            }
+            int position = old_name == null || old_name_used ? -1 : names.indexOf(old_name);
+            boolean new_name_listed = new_name == null || names.contains(new_name);
+            if (position >= 0 && new_name_listed) {
+                names.remove(position);
+            } else if (position >= 0) {
+                names.set(position, new_name);
+            } else if (!new_name_listed) {
+                names.add(new_name);
+            }
+        }
+        if (!changed) {
+            ctx.op = 'noop';
+        }
+    """
+    es_scripted_updates = {
+        "genre": ScriptedUpdate(
+            es_embedded_list_script,
+            id_fields=("genre.uuid",),
+            params={"lists": {"genre": "genres_names"}, "name_field": "name"},
+        ),
+        "person": ScriptedUpdate(
+            es_embedded_list_script,
+            id_fields=("actors.uuid", "writers.uuid", "directors.uuid"),
+            params={
+                "lists": {"actors": "actors_names", "writers": "writers_names", "directors": "directors_names"},
+                "name_field": "full_name",
+            },
+        ),
+    }
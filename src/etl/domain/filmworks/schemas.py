@@ -19,6 +19,10 @@ class MoviePersonList(PgSchema):
     def to_dict(self) -> dict[str, Any]:
         return {"uuid": self.id, "full_name": self.name}
 
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        return {"uuid": data["id"], "full_name": data["name"]}
+
 
 @dataclass
 class MovieDetail(PgSchema):
@@ -107,6 +111,56 @@ class MovieDetail(PgSchema):
         dct.update(self._serialize_persons())
         return dct
 
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        genre_source = GenreList.source_from_row
+        person_source = MoviePersonList.source_from_row
+        return {
+            "uuid": data["id"],
+            "access_type": data["access_type"],
+            "imdb_rating": data["imdb_rating"],
+            "title": data["title"],
+            "description": data["description"],
+            "age_rating": data["age_rating"],
+            "release_date": data["release_date"],
+            "genres_names": data["genres_names"] or [],
+            "actors_names": data["actors_names"] or [],
+            "writers_names": data["writers_names"] or [],
+            "directors_names": data["directors_names"] or [],
+            "genre": [genre_source(genre) for genre in data["genre"] or []],
+            "actors": [person_source(person) for person in data["actors"] or []],
+            "writers": [person_source(person) for person in data["writers"] or []],
+            "directors": [person_source(person) for person in data["directors"] or []],
+        }
+
+    @classmethod
+    def fragment_from_row(cls, data: dict, entity_type: str) -> dict[str, Any]:
+        if entity_type == "genre":
+            genre_source = GenreList.source_from_row
+            return {
+                "genres_names": data["genres_names"] or [],
+                "genre": [genre_source(genre) for genre in data["genre"] or []],
+            }
+        if entity_type == "person":
+            person_source = MoviePersonList.source_from_row
+            return {
+                "actors_names": data["actors_names"] or [],
+                "writers_names": data["writers_names"] or [],
+                "directors_names": data["directors_names"] or [],
+                "actors": [person_source(person) for person in data["actors"] or []],
+                "writers": [person_source(person) for person in data["writers"] or []],
+                "directors": [person_source(person) for person in data["directors"] or []],
+            }
+        return super().fragment_from_row(data, entity_type)
+
+    @classmethod
+    def embedded_from_row(cls, data: dict, entity_type: str) -> dict[str, Any]:
+        if entity_type == "genre":
+            return GenreList.source_from_row(data)
+        if entity_type == "person":
+            return MoviePersonList.source_from_row(data)
+        return super().embedded_from_row(data, entity_type)
+
 
 @dataclass
 class MovieList(PgSchema):
@@ -130,3 +184,10 @@ class MovieList(PgSchema):
             "uuid": self.id, "title": self.title, "imdb_rating": self.imdb_rating,
             "age_rating": self.age_rating, "release_date": self.release_date, "access_type": self.access_type,
         }
+
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        return {
+            "uuid": data["id"], "title": data["title"], "imdb_rating": data["imdb_rating"],
+            "age_rating": data["age_rating"], "release_date": data["release_date"], "access_type": data["access_type"],
+        }
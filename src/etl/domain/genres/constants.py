@@ -1,7 +1,28 @@
 from typing import Final
 
-# The name of the key in the `State` service, which stores values of the last pipeline launches
-ETL_GENRE_LOADED_IDS_KEY: Final[str] = "genre:last_ids"
+# The name of the key in the `State` service, which stores the checkpoint of the last synced entity
+ETL_GENRE_CHECKPOINT_KEY: Final[str] = "genre:checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the index rebuild
+ETL_GENRE_REBUILD_CHECKPOINT_KEY: Final[str] = "genre:rebuild_checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the last consumed changelog record
+ETL_GENRE_CHANGELOG_CHECKPOINT_KEY: Final[str] = "genre:changelog_checkpoint"
+
+# The name of the key in the `State` service, which stores the name of the index version being rebuilt
+ETL_GENRE_REBUILD_INDEX_KEY: Final[str] = "genre:rebuild_index"
+
+# The name of the key in the `State` service, which stores digests of the loaded documents
+ETL_GENRE_HASHES_KEY: Final[str] = "genre:hashes"
+
+# The name of the key in the `State` service, which stores index settings replaced by the bulk ingest profile
+ETL_GENRE_INGEST_SETTINGS_KEY: Final[str] = "genre:ingest_settings"
+
+# The name of the key in the `State` service, which stores the leader lease of the pipeline
+ETL_GENRE_LEADER_KEY: Final[str] = "genre:leader"
+
+# The name of the key in the `State` service, which stores the change probe of the last synced run
+ETL_GENRE_CHANGE_PROBE_KEY: Final[str] = "genre:change_probe"
 
 # Index name in Elasticsearch
 ETL_GENRE_INDEX_NAME: Final[str] = "genre"
@@ -1,29 +1,49 @@
+from etl.domain.dependencies import DependencyGraph
 from etl.domain.extractors import PgExtractor
 
-from .constants import ETL_GENRE_LOADED_IDS_KEY
-from .schemas import GenreDetail
+from .constants import (
+    ETL_GENRE_CHANGE_PROBE_KEY, ETL_GENRE_CHANGELOG_CHECKPOINT_KEY, ETL_GENRE_CHECKPOINT_KEY, ETL_GENRE_LEADER_KEY,
+    ETL_GENRE_REBUILD_CHECKPOINT_KEY,
+)
 
 
 class GenreExtractor(PgExtractor):
     """Genres `Extractor`."""
 
-    etl_schema_class = GenreDetail
+    etl_checkpoint_key = ETL_GENRE_CHECKPOINT_KEY
+    etl_rebuild_checkpoint_key = ETL_GENRE_REBUILD_CHECKPOINT_KEY
+    etl_changelog_checkpoint_key = ETL_GENRE_CHANGELOG_CHECKPOINT_KEY
+    etl_leader_key = ETL_GENRE_LEADER_KEY
+    etl_change_probe_key = ETL_GENRE_CHANGE_PROBE_KEY
 
-    etl_timestamp_key = "genre:last_run_at"
-    etl_loaded_entities_ids_key = ETL_GENRE_LOADED_IDS_KEY
+    source_tables = ("content.genre",)
 
     sql_all_entities = """
         SELECT
             g.id, g.name
         FROM content.genre AS g
-        WHERE g.id IN %s
+        WHERE g.id = ANY(%s)
     """
     sql_entities_to_sync = """
         SELECT
-            g.id
+            g.id, g.modified
         FROM content.genre as g
         WHERE
-            g.modified > %(time_stamp)s
+            (g.modified, g.id) > (%(modified)s, %(id)s)
+        ORDER BY g.modified, g.id
     """
-
-    entity_exclude_field = "g.id"
+    sql_change_probe = """
+        SELECT
+            (SELECT max(g.modified) FROM content.genre AS g) AS "content.genre"
+    """
+    sql_entities_in_range = """
+        SELECT
+            g.id
+        FROM content.genre AS g
+        WHERE
+            g.id BETWEEN %(start)s AND %(stop)s
+            AND (%(after)s::uuid IS NULL OR g.id > %(after)s)
+        ORDER BY g.id
+        LIMIT %(limit)s
+    """
+    dependency_graph = DependencyGraph("genre")
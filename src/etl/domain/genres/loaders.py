@@ -1,12 +1,16 @@
 from etl.domain.loaders import ElasticLoader
 
-from .constants import ETL_GENRE_INDEX_NAME, ETL_GENRE_LOADED_IDS_KEY
+from .constants import (
+    ETL_GENRE_HASHES_KEY, ETL_GENRE_INDEX_NAME, ETL_GENRE_INGEST_SETTINGS_KEY, ETL_GENRE_REBUILD_INDEX_KEY,
+)
 
 
 class GenreLoader(ElasticLoader):
     """Genres `Loader`."""
 
-    etl_loaded_entities_ids_key = ETL_GENRE_LOADED_IDS_KEY
+    etl_ingest_settings_key = ETL_GENRE_INGEST_SETTINGS_KEY
+    etl_rebuild_index_key = ETL_GENRE_REBUILD_INDEX_KEY
+    etl_hashes_key = ETL_GENRE_HASHES_KEY
 
     es_index = {
         "settings": {
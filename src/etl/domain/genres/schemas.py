@@ -17,6 +17,10 @@ class GenreList(PgSchema):
     def to_dict(self) -> dict[str, Any]:
         return {"uuid": self.id, "name": self.name}
 
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        return {"uuid": data["id"], "name": data["name"]}
+
 
 @dataclass
 class GenreDetail(PgSchema):
@@ -30,3 +34,7 @@ class GenreDetail(PgSchema):
 
     def to_dict(self) -> dict[str, Any]:
         return {"uuid": self.id, "name": self.name}
+
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        return {"uuid": data["id"], "name": data["name"]}
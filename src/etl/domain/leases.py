@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import socket
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+from etl.infrastructure.db.storage import FencingError
+
+if TYPE_CHECKING:
+    from etl.infrastructure.db.storage import BaseStorage, StorageBatch
+
+
+class LeaseLostError(Exception):
+    """Lease has expired and may be held by someone else."""
+
+
+class Lease:
+    """Lease on a key in the state storage.
+
+    A lease is held by a single owner until it is released or expires: the owner must renew it more often than every
+    `ttl_seconds`, so the lease of a dead process is taken over by others. Every time the lease is taken, it gets a new
+    fencing token, which is greater than the previous ones: state writes fenced by the token are rejected once the
+    lease is taken by someone else, even if the previous owner doesn't know yet that its lease has expired.
+    """
+
+    def __init__(self, storage: BaseStorage, key: str, ttl_seconds: float) -> None:
+        self.key = key
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self.token = 0
+        self._storage = storage
+        self._ttl_seconds = ttl_seconds
+        self._expires_at = 0.0
+
+    @property
+    def version(self) -> int:
+        """External version of Elasticsearch documents written under the lease.
+
+        Versions grow with fencing tokens and are greater than internal versions of documents written without them.
+        """
+        return self.token << 32
+
+    def acquire(self) -> bool:
+        """Take the lease unless it is held by someone."""
+        acquired_at = time.monotonic()
+        self.token = self._storage.acquire_lease(self.key, self.owner, self._ttl_seconds)
+        self._expires_at = acquired_at + self._ttl_seconds
+        return bool(self.token)
+
+    def renew(self) -> None:
+        """Prolong the lease, raise `LeaseLostError` if it has expired."""
+        renewed_at = time.monotonic()
+        if not self.token or not self._storage.renew_lease(self.key, self.owner, self._ttl_seconds):
+            self.token = 0
+            raise LeaseLostError(f"Lease `{self.key}` has been lost")
+        self._expires_at = renewed_at + self._ttl_seconds
+
+    def check(self) -> None:
+        """Make sure the lease is held for at least half of its TTL, renew it otherwise.
+
+        Is cheap enough to be called before every write. Raise `LeaseLostError` if the lease has been lost.
+        """
+        if not self.token:
+            raise LeaseLostError(f"Lease `{self.key}` has been lost")
+        if time.monotonic() + self._ttl_seconds / 2 >= self._expires_at:
+            self.renew()
+
+    def hold(self) -> bool:
+        """Prolong the lease if it is held, try to take it otherwise. Return whether the lease is held."""
+        try:
+            self.renew()
+        except LeaseLostError:
+            return self.acquire()
+        return True
+
+    def commit(self, state: StorageBatch) -> None:
+        """Apply the batch of state writes, raise `LeaseLostError` if the lease has been taken by someone else."""
+        state.fence(self.key, self.token)
+        try:
+            state.execute()
+        except FencingError as exc:
+            self.token = 0
+            raise LeaseLostError(f"Lease `{self.key}` has been lost") from exc
+
+    def release(self) -> None:
+        """Release the lease if it is still held."""
+        if self.token:
+            self._storage.release_lease(self.key, self.owner)
+            self.token = 0
+
+
+def create_leader_lease(storage: BaseStorage, key: str, ttl_seconds: float) -> Lease | None:
+    """Create a lease for leader election between replicas.
+
+    No lease is created if `ttl_seconds` is zero: every replica leads.
+    """
+    if not ttl_seconds:
+        return None
+    return Lease(storage, key, ttl_seconds)
@@ -1,63 +1,630 @@
 from __future__ import annotations
 
+import copy
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from typing import TYPE_CHECKING, Any, ClassVar
 
 from elasticsearch import Elasticsearch, helpers
 
+from etl.infrastructure.db.elastic import dumps_bytes
+
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Iterator
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+
+    from elasticsearch.serializer import Serializer
+
+    from etl.infrastructure.db.storage import BaseStorage, BaseStorageBatch
+
+    # Bulk action and the serialized document (`None` for deletions)
+    BulkActionT = tuple[dict[str, Any], bytes | None]
+    BulkChunkT = list[BulkActionT]
+
+    # Success flag and the item of a bulk response
+    BulkItemT = tuple[bool, dict[str, Any]]
+
+
+@dataclasses.dataclass
+class LoadStats:
+    """Stats of a loaded batch."""
+
+    documents: int = 0
+    skipped: int = 0
+    updated: int = 0
+    deleted: int = 0
+    rejected: int = 0
+    payload_bytes: int = 0
+
+    # Duration of the slowest bulk request of the batch and the number of documents sent in it
+    seconds: float = 0.0
+    request_documents: int = 0
+
+    def add_request(self, documents: int, seconds: float) -> None:
+        """Record a bulk request, only the slowest one is kept."""
+        if seconds >= self.seconds:
+            self.seconds = seconds
+            self.request_documents = documents
+
 
-    from etl.infrastructure.db.storage import BaseStorage
+@dataclasses.dataclass(frozen=True, slots=True)
+class WriteFence:
+    """Guard of Elasticsearch writes.
+
+    `check` is called before every action is passed on to a bulk request and before every `update_by_query`, it raises
+    if the writer may no longer write (e.g. its lease has expired). If `version` is set, documents are written and
+    deleted with this external version (`external_gte`): writes are rejected once the document has been written with a
+    greater version. Partial updates cannot be versioned.
+    """
+
+    check: Callable[[], None] | None = None
+    version: int | None = None
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ScriptedUpdate:
+    """In-place update of an entity embedded in documents, run with `update_by_query`.
+
+    Documents are found by the entity `uuid` in any of the `id_fields`, fields of nested objects are queried with
+    `nested` queries. The painless `script` gets the entity in `params.entity` along with the other `params`.
+    """
+
+    script: str
+    id_fields: tuple[str, ...]
+    params: dict[str, Any] = dataclasses.field(default_factory=dict)
 
 
 class ElasticLoader:
-    """Data `loader` to Elasticsearch."""
+    """Data `loader` to Elasticsearch.
+
+    Bulk actions, digests of documents and names of index versions are built by class methods, which are shared with
+    `AsyncElasticLoader`.
+    """
 
-    etl_loaded_entities_ids_key: ClassVar[str]
+    # Keys in a state storage
+    etl_ingest_settings_key: ClassVar[str]
+    etl_rebuild_index_key: ClassVar[str]
+    etl_hashes_key: ClassVar[str]
 
     es_index: ClassVar[dict]
     es_index_name: ClassVar[str]
     es_timeout: ClassVar[str] = "3s"
+    es_maintenance_timeout: ClassVar[int] = 600
+
+    # Versioned indices `<es_index_name>_v<N>` behind the `es_index_name` alias
+    es_index_version_separator: ClassVar[str] = "_v"
+    es_index_versions_to_keep: ClassVar[int] = 2
+
+    # Index settings for heavy loads (e.g. full reindex)
+    es_bulk_ingest_settings: ClassVar[dict[str, Any]] = {
+        "index.refresh_interval": "-1",
+        "index.number_of_replicas": 0,
+        "index.translog.durability": "async",
+    }
 
     entity_id_field: ClassVar[str] = "uuid"
 
-    def __init__(self, elastic_client: Elasticsearch, storage: BaseStorage):
+    # In-place updates of embedded entities by entity type
+    es_scripted_updates: ClassVar[dict[str, ScriptedUpdate]] = {}
+
+    # Number of digests looked up in the state storage at once
+    etl_digests_chunk_size: ClassVar[int] = 500
+
+    def __init__(
+        self,
+        elastic_client: Elasticsearch,
+        storage: BaseStorage,
+        *,
+        thread_count: int = 4,
+        chunk_size: int = 0,
+        chunk_bytes: int = 10 * 1024 * 1024,
+        skip_unchanged: bool = True,
+    ):
         self._elastic_client = elastic_client
         self._storage = storage
+        self._thread_count = thread_count
+        self._chunk_size = chunk_size
+        self._chunk_bytes = chunk_bytes
+        self._skip_unchanged = skip_unchanged
+        self._index_mapping_checked = False
+        self._bulk_ingest_enabled = False
+        self._rebuild_index: str | None = None
+
+    def load(
+        self,
+        data: Iterator[dict[str, Any]],
+        index: str | None = None,
+        state: BaseStorageBatch | None = None,
+        fence: WriteFence | None = None,
+    ) -> LoadStats:
+        """Load data to Elasticsearch.
+
+        The index must be prepared with `prepare_index` beforehand. Documents are written to the live index and, while
+        it is being rebuilt, to the new index version as well; unchanged documents are skipped. If `index` is given,
+        all documents are written only there.
+        State changes are queued to the `state` batch if it is given, writes are guarded by the `fence` if it is given.
+        """
+        if index is not None:
+            stats = self.update_index(data, [index], state=state, fence=fence)
+        else:
+            indices = [self.es_index_name]
+            if self._rebuild_index is not None:
+                indices.append(self._rebuild_index)
+            stats = self.update_index(data, indices, skip_unchanged=self._skip_unchanged, state=state, fence=fence)
+
+        self.post_load(stats=stats)
+        return stats
+
+    def prepare_index(self) -> None:
+        """Make sure that the index exists before loading data.
+
+        Is called once per pipeline run. The index mapping is compared with `es_index` only once per loader.
+        Index settings left over from an interrupted bulk ingest are restored.
+        """
+        self.restore_index_settings()
+        self._rebuild_index = self._storage.retrieve(self.etl_rebuild_index_key)
+        if not self._elastic_client.indices.exists(index=self.es_index_name):
+            self.create_index()
+            self._storage.remove(self.etl_hashes_key)
+            self._index_mapping_checked = True
+            return
+        if not self._index_mapping_checked:
+            self.check_index_mapping()
+            self._index_mapping_checked = True
+
+    def check_index_mapping(self) -> bool:
+        """Compare the mapping of the existing index with `es_index`.
+
+        Drifted fields are logged, the index itself is not changed.
+        """
+        response = self._elastic_client.indices.get_mapping(index=self.es_index_name)
+        actual_mappings = next(iter(response.values()))["mappings"]
+        expected_mappings = self.es_index["mappings"]
+        if actual_mappings == expected_mappings:
+            return True
+        actual_fields = actual_mappings.get("properties", {})
+        expected_fields = expected_mappings.get("properties", {})
+        drifted_fields = sorted(
+            field
+            for field in actual_fields.keys() | expected_fields.keys()
+            if actual_fields.get(field) != expected_fields.get(field)
+        )
+        logging.warning(
+            "Mapping of the index `%s` differs from the expected one. Drifted fields: %s",
+            self.es_index_name, ", ".join(drifted_fields) or "-",
+        )
+        return False
+
+    def enable_bulk_ingest(self) -> None:
+        """Switch the index to the bulk ingest profile.
+
+        Refresh and replication are turned off and translog is flushed asynchronously. The original settings are saved
+        to the state storage first, so they can be restored even if the process crashes during the load.
+        """
+        if self._bulk_ingest_enabled:
+            return
+        if self._storage.retrieve(self.etl_ingest_settings_key) is None:
+            original_settings = self.get_index_settings(*self.es_bulk_ingest_settings.keys())
+            self._storage.save(self.etl_ingest_settings_key, json.dumps(original_settings))
+        logging.info("Enable bulk ingest for the index `%s`", self.es_index_name)
+        self._elastic_client.indices.put_settings(index=self.es_index_name, body=self.es_bulk_ingest_settings)
+        self._bulk_ingest_enabled = True
 
-    def load(self, data: Iterator[dict[str, Any]]) -> None:
-        """Load data to Elasticsearch."""
-        _data = list(data)
+    def disable_bulk_ingest(self, *, restore_settings: bool = True) -> None:
+        """Switch the index back from the bulk ingest profile.
 
-        self.create_index()
-        self.update_index(_data)
+        If `restore_settings` is false, the index is left to the writer that has taken it over: settings are restored
+        by its next `prepare_index`.
+        """
+        if not self._bulk_ingest_enabled:
+            return
+        if restore_settings:
+            self.restore_index_settings()
+        self._bulk_ingest_enabled = False
 
-        self.post_load(data=_data)
+    def restore_index_settings(self) -> None:
+        """Restore index settings saved before the bulk ingest, then force merge and refresh the index."""
+        original_settings = self._storage.retrieve(self.etl_ingest_settings_key)
+        if original_settings is None:
+            return
+        logging.info("Restore settings of the index `%s` after bulk ingest", self.es_index_name)
+        indices = self._elastic_client.indices
+        indices.put_settings(index=self.es_index_name, body=json.loads(original_settings))
+        indices.forcemerge(index=self.es_index_name, request_timeout=self.es_maintenance_timeout)
+        indices.refresh(index=self.es_index_name)
+        self._storage.remove(self.etl_ingest_settings_key)
+
+    def get_index_settings(self, *names: str) -> dict[str, Any]:
+        """Get current values of the given index settings (flat names), including defaults."""
+        response = self._elastic_client.indices.get_settings(
+            index=self.es_index_name, name=",".join(names), flat_settings=True, include_defaults=True,
+        )
+        index_settings = next(iter(response.values()))
+        settings = {**index_settings.get("defaults", {}), **index_settings.get("settings", {})}
+        return {name: settings.get(name) for name in names}
 
     def create_index(self) -> None:
-        """Create index in Elasticsearch.
+        """Create the first index version behind the `es_index_name` alias.
 
         If index has been already created, errors will be ignored.
         """
         self._elastic_client.indices.create(
-            index=self.es_index_name,
-            body=self.es_index,
+            index=self.get_next_index_version(),
+            body={**self.es_index, "aliases": {self.es_index_name: {}}},
             ignore=[400],
             timeout=self.es_timeout,
         )
 
-    def update_index(self, data: list[dict[str, Any]]) -> tuple[int, int | list]:
-        """Update documents in the index."""
-        return helpers.bulk(self._elastic_client, data)
+    def start_rebuild(self) -> str:
+        """Create a new index version to rebuild the index into.
+
+        The new version is created with the bulk ingest profile and is saved to the state storage, so that incremental
+        loads write changes to it as well. An unfinished rebuild is resumed.
+        """
+        rebuild_index = self._storage.retrieve(self.etl_rebuild_index_key)
+        if rebuild_index is not None and self._elastic_client.indices.exists(index=rebuild_index):
+            logging.info("Resume rebuild of the index `%s` into `%s`", self.es_index_name, rebuild_index)
+            return rebuild_index
+        rebuild_index = self.get_next_index_version()
+        index_body = copy.deepcopy(self.es_index)
+        index_body["settings"] = {
+            **{
+                name: value
+                for name, value in index_body["settings"].items()
+                if f"index.{name}" not in self.es_bulk_ingest_settings
+            },
+            **self.es_bulk_ingest_settings,
+        }
+        logging.info("Start rebuild of the index `%s` into `%s`", self.es_index_name, rebuild_index)
+        self._elastic_client.indices.create(index=rebuild_index, body=index_body, timeout=self.es_timeout)
+        self._storage.save(self.etl_rebuild_index_key, rebuild_index)
+        return rebuild_index
+
+    def finish_rebuild(self, rebuild_index: str, state: BaseStorageBatch | None = None) -> None:
+        """Switch the `es_index_name` alias to the rebuilt index version and delete old versions.
+
+        Bulk ingest settings of the new version are reset to the ones from `es_index` (or to Elasticsearch defaults).
+        """
+        indices = self._elastic_client.indices
+        live_settings = {
+            name: self.es_index["settings"].get(name.removeprefix("index."))
+            for name in self.es_bulk_ingest_settings
+        }
+        indices.put_settings(index=rebuild_index, body=live_settings)
+        indices.forcemerge(index=rebuild_index, request_timeout=self.es_maintenance_timeout)
+        indices.refresh(index=rebuild_index)
+
+        actions: list[dict[str, Any]] = []
+        if indices.exists_alias(name=self.es_index_name):
+            actions.extend(
+                {"remove": {"index": index, "alias": self.es_index_name}}
+                for index in indices.get_alias(name=self.es_index_name)
+            )
+        elif indices.exists(index=self.es_index_name):
+            actions.append({"remove_index": {"index": self.es_index_name}})
+        actions.append({"add": {"index": rebuild_index, "alias": self.es_index_name}})
+        indices.update_aliases(body={"actions": actions})
+        (state or self._storage).remove(self.etl_rebuild_index_key)
+        logging.info("Index `%s` has been switched to `%s`", self.es_index_name, rebuild_index)
+
+        old_versions = [index for index in self.get_index_versions() if index != rebuild_index]
+        for index in old_versions[:max(len(old_versions) - self.es_index_versions_to_keep + 1, 0)]:
+            logging.info("Delete old index version `%s`", index)
+            indices.delete(index=index, ignore=[404])
+
+    def get_index_versions(self) -> list[str]:
+        """Get names of all index versions, from the oldest to the newest."""
+        pattern = f"{self.es_index_name}{self.es_index_version_separator}*"
+        indices = self._elastic_client.indices.get_alias(index=pattern, ignore_unavailable=True)
+        return sorted(indices, key=self.parse_index_version)
+
+    def get_next_index_version(self) -> str:
+        """Get name of the next index version."""
+        return self.make_next_index_version(self.get_index_versions())
+
+    @classmethod
+    def make_next_index_version(cls, versions: Iterable[str]) -> str:
+        """Make name of the index version that follows the given ones."""
+        next_version = max(map(cls.parse_index_version, versions), default=0) + 1
+        return f"{cls.es_index_name}{cls.es_index_version_separator}{next_version}"
+
+    @classmethod
+    def parse_index_version(cls, index: str) -> int:
+        """Get number of the index version, `0` if the index is not versioned."""
+        version = index.rsplit(cls.es_index_version_separator, 1)[-1]
+        return int(version) if version.isdigit() else 0
+
+    def update_index(
+        self,
+        data: Iterable[dict[str, Any]],
+        indices: Sequence[str],
+        *,
+        skip_unchanged: bool = False,
+        state: BaseStorageBatch | None = None,
+        fence: WriteFence | None = None,
+    ) -> LoadStats:
+        """Update documents in the given indices.
+
+        Documents are streamed to Elasticsearch in chunks of up to `chunk_bytes` bytes (and `chunk_size` documents, if
+        it is set), only the chunks in flight are kept in memory. If any document fails to index, `BulkIndexError` is
+        raised after all chunks have been processed. The slowest bulk request is recorded to the stats.
+        Partial updates and deletions of missing documents are not errors: a missing document is written in full once
+        its entity is synced. Writes rejected by the `fence` version are not errors either: the document has been
+        written by a newer writer. `update_by_query` actions are run after the bulk requests. Digests of partially
+        updated and deleted documents are dropped.
+        """
+        stats = LoadStats()
+        errors: list[dict[str, Any]] = []
+        digests: dict[str, str] = {}
+        stale_digest_ids: set[str] = set()
+        scripted_updates: list[dict[str, Any]] = []
+        documents = self.serialize_documents(self._split_scripted_updates(data, scripted_updates))
+        if skip_unchanged:
+            documents = self.skip_unchanged_documents(documents, stats, digests)
+        chunks = self.chunk_actions(
+            self.expand_actions(documents, stats, indices, fence), self._chunk_size, self._chunk_bytes,
+        )
+        for items, seconds in self._streaming_bulk(chunks):
+            stats.add_request(max(len(items) // len(indices), 1), seconds)
+            self.count_bulk_items(items, stats, errors, digests, stale_digest_ids, fence)
+        if scripted_updates:
+            stale_digest_ids.update(self.run_scripted_updates(scripted_updates, indices, stats, errors, fence))
+        if stats.rejected:
+            logging.warning(
+                "%d write(s) to the index `%s` have been rejected: written by a newer writer",
+                stats.rejected, self.es_index_name,
+            )
+        if errors:
+            logging.error("Failed to index %d document(s) to the index `%s`", len(errors), self.es_index_name)
+            raise helpers.BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+        if digests:
+            (state or self._storage).save_map(self.etl_hashes_key, digests)
+        if stale_digest_ids:
+            (state or self._storage).remove_map_values(self.etl_hashes_key, *stale_digest_ids)
+        return stats
+
+    @staticmethod
+    def count_bulk_items(
+        items: Iterable[BulkItemT],
+        stats: LoadStats,
+        errors: list[dict[str, Any]],
+        digests: dict[str, str],
+        stale_digest_ids: set[str],
+        fence: WriteFence | None = None,
+    ) -> None:
+        """Count items of a bulk response to the stats, collect errors and IDs of documents with stale digests."""
+        for ok, item in items:
+            (op_type, result), = item.items()
+            if not ok and fence is not None and fence.version is not None and result.get("status") == 409:
+                stats.rejected += 1
+                digests.pop(str(result["_id"]), None)
+            elif op_type in {"update", "delete"} and (ok or result.get("status") == 404):
+                if op_type == "update":
+                    stats.updated += 1
+                else:
+                    stats.deleted += 1
+                stale_digest_ids.add(str(result["_id"]))
+            elif ok:
+                stats.documents += 1
+            else:
+                errors.append(item)
+
+    def run_scripted_updates(
+        self,
+        actions: Sequence[dict[str, Any]],
+        indices: Sequence[str],
+        stats: LoadStats,
+        errors: list[dict[str, Any]],
+        fence: WriteFence | None = None,
+    ) -> set[str]:
+        """Update embedded entities in place in all documents of the `indices` that embed them.
+
+        Indices are refreshed first, so that documents written by the bulk requests are found by the queries.
+        Documents changed concurrently are skipped, documents that already embed the same entity are not rewritten.
+        The `fence` is checked before every update. Return IDs of the documents that might have been updated.
+        """
+        client = self._elastic_client
+        serializer = client.transport.serializer
+        index = ",".join(indices)
+        client.indices.refresh(index=index)
+        documents_ids: set[str] = set()
+        for action in actions:
+            scripted_update = self.es_scripted_updates[action["entity_type"]]
+            entity = action["entity"]
+            body = {
+                "query": self.get_scripted_update_query(scripted_update, entity["uuid"]),
+                "script": {
+                    "source": scripted_update.script,
+                    "lang": "painless",
+                    "params": {**scripted_update.params, "entity": entity},
+                },
+            }
+            stats.payload_bytes += len(dumps_bytes(serializer, body))
+            if fence is not None and fence.check is not None:
+                fence.check()
+            response = client.update_by_query(
+                index=index, body=body, conflicts="proceed", request_timeout=self.es_maintenance_timeout,
+            )
+            stats.updated += response["updated"]
+            stats.skipped += response["noops"]
+            errors.extend(response["failures"])
+            documents_ids.update(action["documents_ids"])
+        return documents_ids
+
+    def get_scripted_update_query(self, scripted_update: ScriptedUpdate, entity_id: Any) -> dict[str, Any]:
+        """Get query for documents that embed the entity."""
+        properties = self.es_index["mappings"]["properties"]
+        queries: list[dict[str, Any]] = []
+        for field in scripted_update.id_fields:
+            query: dict[str, Any] = {"term": {field: entity_id}}
+            path = field.split(".", 1)[0]
+            if properties.get(path, {}).get("type") == "nested":
+                query = {"nested": {"path": path, "query": query}}
+            queries.append(query)
+        return {"bool": {"should": queries, "minimum_should_match": 1}}
+
+    @staticmethod
+    def _split_scripted_updates(
+        data: Iterable[dict[str, Any]], scripted_updates: list[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        """Pass bulk actions on, collect `update_by_query` actions to `scripted_updates`."""
+        for action in data:
+            if action.get("_op_type") == "update_by_query":
+                scripted_updates.append(action)
+            else:
+                yield action
+
+    def _streaming_bulk(self, chunks: Iterable[BulkChunkT]) -> Iterator[tuple[list[BulkItemT], float]]:
+        """Send bulk requests, up to `thread_count` requests at once.
+
+        Chunks are built lazily, only the chunks in flight are kept in memory. Results are passed on in the order of
+        the chunks.
+        """
+        if self._thread_count <= 1:
+            yield from map(self._bulk, chunks)
+            return
+        with ThreadPoolExecutor(max_workers=self._thread_count, thread_name_prefix="bulk") as executor:
+            requests: deque[Future[tuple[list[BulkItemT], float]]] = deque()
+            for chunk in chunks:
+                if len(requests) >= self._thread_count:
+                    yield requests.popleft().result()
+                requests.append(executor.submit(self._bulk, chunk))
+            while requests:
+                yield requests.popleft().result()
+
+    def _bulk(self, chunk: BulkChunkT) -> tuple[list[BulkItemT], float]:
+        """Send a bulk request, return its items paired with their success flags and the duration of the request."""
+        body = self.make_bulk_body(chunk, self._elastic_client.transport.serializer)
+        started_at = time.perf_counter()
+        response = self._elastic_client.bulk(body=body)
+        seconds = time.perf_counter() - started_at
+        return [self.check_bulk_item(item) for item in response["items"]], seconds
+
+    @staticmethod
+    def chunk_actions(actions: Iterable[BulkActionT], chunk_size: int, chunk_bytes: int) -> Iterator[BulkChunkT]:
+        """Split actions to chunks of up to `chunk_bytes` bytes of documents and `chunk_size` actions (`0` - any)."""
+        chunk: BulkChunkT = []
+        size = 0
+        for operation, document in actions:
+            document_bytes = len(document) if document is not None else 0
+            if chunk and (len(chunk) == chunk_size or size + document_bytes > chunk_bytes):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append((operation, document))
+            size += document_bytes
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def make_bulk_body(chunk: BulkChunkT, serializer: Serializer) -> bytes:
+        """Build the NDJSON body of a bulk request, documents are passed on as serialized."""
+        lines: list[bytes] = []
+        for operation, document in chunk:
+            lines.append(dumps_bytes(serializer, operation))
+            if document is not None:
+                lines.append(document)
+        lines.append(b"")
+        return b"\n".join(lines)
+
+    @staticmethod
+    def check_bulk_item(item: dict[str, Any]) -> BulkItemT:
+        """Pair an item of a bulk response with its success flag."""
+        (_, result), = item.items()
+        return 200 <= result.get("status", 500) < 300, item
+
+    def serialize_documents(self, data: Iterable[dict[str, Any]]) -> Iterator[BulkActionT]:
+        """Expand bulk actions and serialize documents with the serializer of the client."""
+        return self.serialize_actions(data, self._elastic_client.transport.serializer)
+
+    @staticmethod
+    def serialize_actions(data: Iterable[dict[str, Any]], serializer: Serializer) -> Iterator[BulkActionT]:
+        """Expand bulk actions and serialize documents.
+
+        Documents are serialized to bytes only once: the same payload is used for hashing, measuring and the bulk
+        request. Documents serialized beforehand (e.g. by the transformer) are passed as is.
+        """
+        for action in data:
+            operation, source = helpers.expand_action(action)
+            yield operation, None if source is None else dumps_bytes(serializer, source)
+
+    def skip_unchanged_documents(
+        self, documents: Iterable[BulkActionT], stats: LoadStats, digests: dict[str, str],
+    ) -> Iterator[BulkActionT]:
+        """Drop documents that are identical to the ones loaded before.
+
+        Documents are compared by digests of their `_source`, which are kept in the state storage by document ID.
+        Digests of the documents that have to be written are collected to `digests`. Partial updates and deletions are
+        passed as is.
+        """
+        documents = iter(documents)
+        while chunk := list(islice(documents, self.etl_digests_chunk_size)):
+            chunk_ids = [self.get_document_id(operation) for operation, _ in chunk]
+            stored_digests = self._storage.retrieve_map_values(self.etl_hashes_key, *chunk_ids)
+            yield from self.select_changed_documents(chunk, stored_digests, stats, digests)
+
+    @classmethod
+    def select_changed_documents(
+        cls,
+        documents: Sequence[BulkActionT],
+        stored_digests: Sequence[str | None],
+        stats: LoadStats,
+        digests: dict[str, str],
+    ) -> Iterator[BulkActionT]:
+        """Drop documents with the same digests as the `stored_digests` (in the order of `documents`)."""
+        for (operation, document), stored_digest in zip(documents, stored_digests, strict=True):
+            if document is None or "index" not in operation:
+                yield operation, document
+                continue
+            digest = cls.get_document_digest(document)
+            if digest == stored_digest:
+                stats.skipped += 1
+                continue
+            digests[cls.get_document_id(operation)] = digest
+            yield operation, document
+
+    @staticmethod
+    def get_document_digest(document: bytes) -> str:
+        """Get a stable digest of the serialized document."""
+        return hashlib.blake2b(document, digest_size=16).hexdigest()
+
+    @staticmethod
+    def get_document_id(operation: dict[str, Any]) -> str:
+        """Get ID of the document of the bulk action."""
+        return str(next(iter(operation.values()))["_id"])
+
+    @staticmethod
+    def expand_actions(
+        documents: Iterable[BulkActionT],
+        stats: LoadStats,
+        indices: Sequence[str],
+        fence: WriteFence | None = None,
+    ) -> Iterator[BulkActionT]:
+        """Expand serialized documents to bulk actions for each of the `indices`.
+
+        Bulk requests are built from the actions lazily, so the `fence` is checked right before an action is sent.
+        """
+        versioning: dict[str, Any] = {}
+        if fence is not None and fence.version is not None:
+            versioning = {"version": fence.version, "version_type": "external_gte"}
+        for operation, document in documents:
+            if fence is not None and fence.check is not None:
+                fence.check()
+            (op_type, metadata), = operation.items()
+            if op_type in {"index", "delete"}:
+                metadata = {**metadata, **versioning}
+            document_bytes = len(document) if document is not None else 0
+            for index in indices:
+                stats.payload_bytes += document_bytes
+                yield {op_type: {**metadata, "_index": index}}, document
 
     def post_load(self, *args: Any, **kwargs: Any) -> None:
         """`Post-load` signal.
 
         Method is called after data upload.
         """
-        self.update_ids_in_state(kwargs["data"])
-
-    def update_ids_in_state(self, data: Iterable[dict[str, Any]]) -> None:
-        """Update current state with IDs of uploaded documents."""
-        ids = [str(entity_data["_source"][self.entity_id_field]) for entity_data in data]
-        self._storage.save_list(self.etl_loaded_entities_ids_key, *ids)
@@ -1,7 +1,28 @@
 from typing import Final
 
-# The name of the key in the `State` service, which stores values of the last pipeline launches
-ETL_PERSON_LOADED_IDS_KEY: Final[str] = "person:last_ids"
+# The name of the key in the `State` service, which stores the checkpoint of the last synced entity
+ETL_PERSON_CHECKPOINT_KEY: Final[str] = "person:checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the index rebuild
+ETL_PERSON_REBUILD_CHECKPOINT_KEY: Final[str] = "person:rebuild_checkpoint"
+
+# The name of the key in the `State` service, which stores the checkpoint of the last consumed changelog record
+ETL_PERSON_CHANGELOG_CHECKPOINT_KEY: Final[str] = "person:changelog_checkpoint"
+
+# The name of the key in the `State` service, which stores the name of the index version being rebuilt
+ETL_PERSON_REBUILD_INDEX_KEY: Final[str] = "person:rebuild_index"
+
+# The name of the key in the `State` service, which stores digests of the loaded documents
+ETL_PERSON_HASHES_KEY: Final[str] = "person:hashes"
+
+# The name of the key in the `State` service, which stores index settings replaced by the bulk ingest profile
+ETL_PERSON_INGEST_SETTINGS_KEY: Final[str] = "person:ingest_settings"
+
+# The name of the key in the `State` service, which stores the leader lease of the pipeline
+ETL_PERSON_LEADER_KEY: Final[str] = "person:leader"
+
+# The name of the key in the `State` service, which stores the change probe of the last synced run
+ETL_PERSON_CHANGE_PROBE_KEY: Final[str] = "person:change_probe"
 
 # Index name in Elasticsearch
 ETL_PERSON_INDEX_NAME: Final[str] = "person"
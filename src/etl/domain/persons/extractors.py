@@ -1,16 +1,22 @@
+from etl.domain.dependencies import Dependency, DependencyGraph
 from etl.domain.extractors import PgExtractor
 
-from .constants import ETL_PERSON_LOADED_IDS_KEY
-from .schemas import PersonFullDetail
+from .constants import (
+    ETL_PERSON_CHANGE_PROBE_KEY, ETL_PERSON_CHANGELOG_CHECKPOINT_KEY, ETL_PERSON_CHECKPOINT_KEY, ETL_PERSON_LEADER_KEY,
+    ETL_PERSON_REBUILD_CHECKPOINT_KEY,
+)
 
 
 class PersonExtractor(PgExtractor):
     """Persons `Extractor`."""
 
-    etl_schema_class = PersonFullDetail
+    etl_checkpoint_key = ETL_PERSON_CHECKPOINT_KEY
+    etl_rebuild_checkpoint_key = ETL_PERSON_REBUILD_CHECKPOINT_KEY
+    etl_changelog_checkpoint_key = ETL_PERSON_CHANGELOG_CHECKPOINT_KEY
+    etl_leader_key = ETL_PERSON_LEADER_KEY
+    etl_change_probe_key = ETL_PERSON_CHANGE_PROBE_KEY
 
-    etl_timestamp_key = "person:last_run_at"
-    etl_loaded_entities_ids_key = ETL_PERSON_LOADED_IDS_KEY
+    source_tables = ("content.person", "content.person_film_work", "content.film_work")
 
     sql_all_entities = """
         SELECT
@@ -40,17 +46,120 @@ class PersonExtractor(PgExtractor):
         FROM content.person AS p
         LEFT JOIN content.person_film_work pfw on p.id = pfw.person_id
         LEFT OUTER JOIN content.film_work fw on fw.id = pfw.film_work_id
-        WHERE p.id IN %s
+        WHERE p.id = ANY(%s)
         GROUP BY p.id
     """
+    sql_all_entities_json = """
+        SELECT
+            p.id,
+            jsonb_build_object(
+                'uuid', p.id,
+                'full_name', p.full_name,
+                'films_ids', coalesce(to_jsonb(array_agg(DISTINCT fw.id)), '[]'::jsonb),
+                'roles', jsonb_build_array(
+                    jsonb_build_object(
+                        'role', 'actor',
+                        'films', coalesce(
+                            jsonb_agg(
+                                DISTINCT jsonb_build_object(
+                                    'uuid', fw.id, 'title', fw.title, 'imdb_rating', fw.rating,
+                                    'age_rating', fw.age_rating, 'release_date', fw.release_date,
+                                    'access_type', fw.access_type
+                                ))
+                                FILTER (WHERE pfw.role = 'actor'
+                            ),
+                            '[]'::jsonb
+                        )
+                    ),
+                    jsonb_build_object(
+                        'role', 'writer',
+                        'films', coalesce(
+                            jsonb_agg(
+                                DISTINCT jsonb_build_object(
+                                    'uuid', fw.id, 'title', fw.title, 'imdb_rating', fw.rating,
+                                    'age_rating', fw.age_rating, 'release_date', fw.release_date,
+                                    'access_type', fw.access_type
+                                ))
+                                FILTER (WHERE pfw.role = 'writer'
+                            ),
+                            '[]'::jsonb
+                        )
+                    ),
+                    jsonb_build_object(
+                        'role', 'director',
+                        'films', coalesce(
+                            jsonb_agg(
+                                DISTINCT jsonb_build_object(
+                                    'uuid', fw.id, 'title', fw.title, 'imdb_rating', fw.rating,
+                                    'age_rating', fw.age_rating, 'release_date', fw.release_date,
+                                    'access_type', fw.access_type
+                                ))
+                                FILTER (WHERE pfw.role = 'director'
+                            ),
+                            '[]'::jsonb
+                        )
+                    )
+                )
+            )::text AS es_source
+        FROM content.person AS p
+        LEFT JOIN content.person_film_work pfw on p.id = pfw.person_id
+        LEFT OUTER JOIN content.film_work fw on fw.id = pfw.film_work_id
+        WHERE p.id = ANY(%s)
+        GROUP BY p.id
+    """
+    # Changed persons are found by range scans of every source table on its `modified`, only they are aggregated
     sql_entities_to_sync = """
+        WITH changed_person AS (
+            SELECT p.id FROM content.person AS p WHERE (p.modified, p.id) > (%(modified)s, %(id)s)
+            UNION
+            SELECT pfw.person_id AS id
+            FROM content.film_work AS fw
+            JOIN content.person_film_work pfw on pfw.film_work_id = fw.id
+            WHERE fw.modified >= %(modified)s
+        )
         SELECT
-            DISTINCT p.id
-        FROM content.person as p
+            p.id, greatest(p.modified, max(fw.modified)) AS modified
+        FROM changed_person AS cp
+        JOIN content.person p on p.id = cp.id
         LEFT JOIN content.person_film_work pfw on pfw.person_id = p.id
         LEFT JOIN content.film_work fw on pfw.film_work_id = fw.id
+        GROUP BY p.id
+        HAVING (greatest(p.modified, max(fw.modified)), p.id) > (%(modified)s, %(id)s)
+        ORDER BY modified, p.id
+    """
+    sql_change_probe = """
+        SELECT
+            (SELECT max(p.modified) FROM content.person AS p) AS "content.person",
+            (SELECT max(fw.modified) FROM content.film_work AS fw) AS "content.film_work"
+    """
+    sql_entities_in_range = """
+        SELECT
+            p.id
+        FROM content.person AS p
         WHERE
-            (p.modified > %(time_stamp)s or fw.modified > %(time_stamp)s)
+            p.id BETWEEN %(start)s AND %(stop)s
+            AND (%(after)s::uuid IS NULL OR p.id > %(after)s)
+        ORDER BY p.id
+        LIMIT %(limit)s
     """
-
-    entity_exclude_field = "p.id"
+    dependency_graph = DependencyGraph(
+        "person",
+        Dependency(
+            "film_work",
+            sql_affected="""
+                SELECT DISTINCT
+                    pfw.person_id AS id
+                FROM content.person_film_work AS pfw
+                WHERE pfw.film_work_id = ANY(%s)
+            """,
+            sql_embedded="""
+                SELECT
+                    fw.id, fw.title, fw.rating AS imdb_rating, fw.age_rating, fw.release_date, fw.access_type,
+                    array_agg(DISTINCT pfw.person_id) FILTER (WHERE pfw.person_id IS NOT NULL) AS documents_ids
+                FROM content.film_work AS fw
+                LEFT JOIN content.person_film_work pfw on pfw.film_work_id = fw.id
+                WHERE fw.id = ANY(%s)
+                GROUP BY fw.id
+            """,
+        ),
+    )
@@ -1,12 +1,16 @@
-from etl.domain.loaders import ElasticLoader
+from etl.domain.loaders import ElasticLoader, ScriptedUpdate
 
-from .constants import ETL_PERSON_INDEX_NAME, ETL_PERSON_LOADED_IDS_KEY
+from .constants import (
+    ETL_PERSON_HASHES_KEY, ETL_PERSON_INDEX_NAME, ETL_PERSON_INGEST_SETTINGS_KEY, ETL_PERSON_REBUILD_INDEX_KEY,
+)
 
 
 class PersonLoader(ElasticLoader):
     """Persons `Loader`."""
 
-    etl_loaded_entities_ids_key = ETL_PERSON_LOADED_IDS_KEY
+    etl_ingest_settings_key = ETL_PERSON_INGEST_SETTINGS_KEY
+    etl_rebuild_index_key = ETL_PERSON_REBUILD_INDEX_KEY
+    etl_hashes_key = ETL_PERSON_HASHES_KEY
 
     es_index = {
         "settings": {
@@ -115,3 +119,23 @@ class PersonLoader(ElasticLoader):
     }
 
     es_index_name = ETL_PERSON_INDEX_NAME
+
+    es_scripted_updates = {
+        "film_work": ScriptedUpdate(
+            """
+                boolean changed = false;
+                for (Map role : ctx._source.roles) {
+                    for (Map film : role.films) {
+                        if (film.uuid == params.entity.uuid && !film.equals(params.entity)) {
+                            film.putAll(params.entity);
+                            changed = true;
+                        }
+                    }
+                }
+                if (!changed) {
+                    ctx.op = 'noop';
+                }
+            """,
+            id_fields=("films_ids",),
+        ),
+    }
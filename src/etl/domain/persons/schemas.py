@@ -32,6 +32,15 @@ class PersonRoleFilm(BasePgSchema):
             "films": [film.to_dict() for film in self.films],
         }
 
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        role = data["role"]
+        film_source = MovieList.source_from_row
+        return {
+            "role": role,
+            "films": [film_source(film) for film in data[role] or []],
+        }
+
 
 @dataclass
 class PersonFullDetail(PgSchema):
@@ -72,3 +81,22 @@ class PersonFullDetail(PgSchema):
             "films_ids": self.films_ids,
             "roles": [role.to_dict() for role in self.roles],
         }
+
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        film_source = MovieList.source_from_row
+        return {
+            "uuid": data["id"],
+            "full_name": data["full_name"],
+            "films_ids": data["films_ids"] or [],
+            "roles": [
+                {"role": person_type, "films": [film_source(film) for film in data[person_type] or []]}
+                for person_type in ("actor", "writer", "director")
+            ],
+        }
+
+    @classmethod
+    def embedded_from_row(cls, data: dict, entity_type: str) -> dict[str, Any]:
+        if entity_type == "film_work":
+            return MovieList.source_from_row(data)
+        return super().embedded_from_row(data, entity_type)
@@ -1,15 +1,58 @@
 import dataclasses
 import datetime
-from collections.abc import Iterator
-from typing import Any
+import logging
+import queue
+import threading
+import uuid
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+from typing import Any, Final
 
-from etl.infrastructure.db.storage import BaseStorage
+from etl.infrastructure.db.storage import BaseStorage, BaseStorageBatch, StorageBatch
 
-from .extractors import PgExtractor
-from .loaders import ElasticLoader
-from .schemas import PgSchema
+from .batching import BatchSizer
+from .checkpoints import AnyCheckpoint, Checkpoint
+from .extractors import ChangeProbe, PgExtractor
+from .leases import Lease, LeaseLostError, create_leader_lease
+from .loaders import ElasticLoader, LoadStats, WriteFence
 from .transformers import ElasticTransformer
 
+BatchT = tuple[Sequence[dict], AnyCheckpoint]
+TransformedBatchT = tuple[list[dict[str, Any]], AnyCheckpoint]
+
+# End of a stage output
+_STAGE_DONE: Final = object()
+
+# How often (seconds) blocked stages check whether the pipeline has been stopped
+_STAGE_POLL_INTERVAL: Final[float] = 0.1
+
+
+@dataclasses.dataclass
+class _StageError:
+    """Exception raised in a stage, passed on to the next one."""
+
+    exc: BaseException
+
+
+@dataclasses.dataclass
+class RunReport:
+    """Summary of a pipeline run."""
+
+    batches: int = 0
+    documents: int = 0
+    skipped: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    # The run has been skipped because none of the source tables has changed
+    probe_skipped: bool = False
+
+    def add(self, stats: LoadStats) -> None:
+        self.batches += 1
+        self.documents += stats.documents
+        self.skipped += stats.skipped
+        self.updated += stats.updated
+        self.deleted += stats.deleted
+
 
 @dataclasses.dataclass
 class ETLPipeline:
@@ -19,28 +62,277 @@ class ETLPipeline:
     transformer: ElasticTransformer
     extractor: PgExtractor
     storage: BaseStorage
+    batch_sizer: BatchSizer
+
+    # The index is switched to the bulk ingest profile for a run if at least this many changes are pending before it
+    # (replicas and refresh are turned off until the run ends), `0` - never
+    bulk_ingest_threshold: int = 0
+
+    # Number of extra passes over changes made while the index is being rebuilt
+    rebuild_catch_up_passes: int = 1
+
+    # Changes made up to this long before a backfill has started are loaded again after it: `modified` timestamps are
+    # set by other hosts
+    backfill_catch_up_margin_seconds: float = 300.0
+
+    # Staged mode: extract, transform and load run concurrently, connected with bounded queues
+    staged: bool = False
+    extract_queue_size: int = 2
+    transform_queue_size: int = 2
+
+    # Leader election between replicas: only the holder of the lease runs the pipeline, `0` - every replica runs it
+    leader_lease_ttl_seconds: float = 0.0
+    leader_lease: Lease | None = dataclasses.field(init=False)
+
+    # Totals of runs skipped because none of the source tables has changed (hits) / runs that have probed changes
+    # (misses), since the pipeline has been created
+    probe_hits: int = dataclasses.field(default=0, init=False)
+    probe_misses: int = dataclasses.field(default=0, init=False)
 
-    def extract(self) -> Iterator[list[PgSchema]]:
-        yield from self.extractor.extract()
+    def __post_init__(self) -> None:
+        self.leader_lease = create_leader_lease(
+            self.storage, self.extractor.etl_leader_key, self.leader_lease_ttl_seconds,
+        )
 
-    def transform(self, data: list[PgSchema]) -> Iterator[dict[str, Any]]:
+    def extract(self, checkpoint: AnyCheckpoint | None = None) -> Iterator[BatchT]:
+        yield from self.extractor.extract(checkpoint)
+
+    def transform(self, data: Sequence[dict]) -> Iterator[dict[str, Any]]:
         return self.transformer.transform(data)
 
-    def load(self, data: Iterator[dict[str, Any]]) -> None:
-        self.loader.load(data)
+    def load(
+        self,
+        data: Iterator[dict[str, Any]],
+        state: BaseStorageBatch | None = None,
+        fence: WriteFence | None = None,
+    ) -> LoadStats:
+        return self.loader.load(data, state=state, fence=fence)
+
+    def execute(self) -> RunReport:
+        if self.leader_lease is not None and not self.leader_lease.hold():
+            logging.debug("Index `%s` is synced by another replica", self.loader.es_index_name)
+            return RunReport()
+        self.loader.prepare_index()
+        report = RunReport()
+        probe = self.probe_changes(report)
+        if report.probe_skipped:
+            self.post_execute(report=report)
+            return report
+        fence = self.get_write_fence()
+        try:
+            if self.bulk_ingest_threshold and self.extractor.count_backlog() >= self.bulk_ingest_threshold:
+                if self.leader_lease is not None:
+                    self.leader_lease.check()
+                self.loader.enable_bulk_ingest()
+            for actions, checkpoint in self.batches():
+                state = self.storage.batch()
+                stats = self.load(actions, state=state, fence=fence)
+                self.update_checkpoint_state(checkpoint, state=state)
+                self.commit_state(state)
+                self.batch_sizer.observe(stats)
+                report.add(stats)
+            if probe is not None:
+                state = self.storage.batch()
+                self.extractor.save_change_probe(probe, state)
+                self.commit_state(state)
+        except LeaseLostError:
+            logging.warning("Leader lease of the index `%s` has been lost", self.loader.es_index_name)
+        finally:
+            self.loader.disable_bulk_ingest(restore_settings=self.is_leader())
+        self.post_execute(report=report)
+        return report
+
+    def is_leader(self) -> bool:
+        """Whether the replica holds the leader lease (always, if replicas don't elect a leader)."""
+        if self.leader_lease is None:
+            return True
+        try:
+            self.leader_lease.check()
+        except LeaseLostError:
+            return False
+        return True
+
+    def get_write_fence(self) -> WriteFence | None:
+        """Get the guard of Elasticsearch writes of the leader (`None` if replicas don't elect a leader).
+
+        The lease is checked before every write, and documents are written with the lease version: once a newer leader
+        has written a document, writes of a stale leader that has not noticed the lease loss yet are rejected.
+        """
+        if self.leader_lease is None:
+            return None
+        return WriteFence(check=self.leader_lease.check, version=self.leader_lease.version)
+
+    def get_rebuild_fence(self, check: Callable[[], None] | None = None) -> WriteFence | None:
+        """Get the guard of writes to the rebuilt index, `check` is called before every write.
+
+        If replicas elect a leader, documents are written with the lowest version: they don't overwrite the ones the
+        leader has written to the rebuilt index meanwhile, which are newer.
+        """
+        version = 0 if self.leader_lease is not None else None
+        if check is None and version is None:
+            return None
+        return WriteFence(check=check, version=version)
+
+    def probe_changes(self, report: RunReport) -> ChangeProbe | None:
+        """Probe the source tables for changes before running the sync query, count probe hits and misses.
+
+        The probe is cheaper than the sync query: the run is skipped if none of the tables has changed.
+        Return `None` if the extractor doesn't probe changes.
+        """
+        if not self.extractor.probes_changes:
+            return None
+        probe = self.extractor.probe_changes()
+        if probe.changed_tables:
+            self.probe_misses += 1
+            logging.debug(
+                "Index `%s`: changed tables: %s", self.loader.es_index_name, ", ".join(probe.changed_tables),
+            )
+        else:
+            self.probe_hits += 1
+            report.probe_skipped = True
+        return probe
 
-    def execute(self) -> None:
-        for batch in self.extract():
-            self.load(self.transform(batch))
-        self.post_execute()
+    def commit_state(self, state: StorageBatch) -> None:
+        """Save state of a loaded batch.
+
+        If replicas elect a leader, the lease is renewed and the state is saved only if no other replica has taken the
+        lease meanwhile. Documents written by a stale leader are rejected by their versions (see `get_write_fence`).
+        """
+        if self.leader_lease is None:
+            state.execute()
+            return
+        self.leader_lease.renew()
+        self.leader_lease.commit(state)
 
     def post_execute(self, *args: Any, **kwargs: Any) -> None:
-        self.update_timestamp_state()
-        self.remove_ids_from_state()
+        report: RunReport = kwargs["report"]
+        if report.probe_skipped:
+            logging.debug(
+                "Index `%s`: source tables have not changed, run skipped (%d of %d probed run(s) skipped)",
+                self.loader.es_index_name, self.probe_hits, self.probe_hits + self.probe_misses,
+            )
+        if report.batches:
+            logging.info(
+                "Index `%s`: %d document(s) written, %d unchanged document(s) skipped,"
+                " %d document(s) updated partially, %d document(s) deleted in %d batch(es)",
+                self.loader.es_index_name, report.documents, report.skipped, report.updated, report.deleted,
+                report.batches,
+            )
+        if report.batches and self.probe_hits:
+            logging.info(
+                "Index `%s`: %d of %d probed run(s) skipped, the source tables had not changed",
+                self.loader.es_index_name, self.probe_hits, self.probe_hits + self.probe_misses,
+            )
+
+    def rebuild(self, backfill: Callable[[str], None] | None = None) -> str:
+        """Rebuild the index into a new index version and switch the alias to it, return the new version.
+
+        Meanwhile, incremental runs keep loading changes to the live index and to the new index version.
+        If `backfill` is given, it is called with the new version to load all entities (e.g. with `Backfill.run`),
+        then only changes made since the backfill has started are loaded.
+        """
+        rebuild_index = self.loader.start_rebuild()
+        checkpoint_key = self.extractor.etl_rebuild_checkpoint_key
+        if backfill is not None:
+            if self.storage.retrieve(checkpoint_key) is None:
+                started = datetime.datetime.now(tz=datetime.UTC)
+                margin = datetime.timedelta(seconds=self.backfill_catch_up_margin_seconds)
+                backfill_checkpoint = Checkpoint(modified=started - margin, entity_id=uuid.UUID(int=0))
+                self.update_checkpoint_state(backfill_checkpoint, key=checkpoint_key)
+            backfill(rebuild_index)
+        for _ in range(1 + self.rebuild_catch_up_passes):
+            for actions, checkpoint in self.batches(self.extractor.get_checkpoint(checkpoint_key)):
+                stats = self.loader.load(actions, index=rebuild_index, fence=self.get_rebuild_fence())
+                self.update_checkpoint_state(checkpoint, key=checkpoint_key)
+                self.batch_sizer.observe(stats)
+        state = self.storage.batch()
+        self.loader.finish_rebuild(rebuild_index, state=state)
+        state.remove(checkpoint_key)
+        state.execute()
+        return rebuild_index
+
+    def batches(
+        self, checkpoint: AnyCheckpoint | None = None,
+    ) -> Iterator[tuple[Iterator[dict[str, Any]], AnyCheckpoint]]:
+        """Extract and transform batches, in order.
+
+        Checkpoint of a batch must be saved only after the batch has been loaded.
+        """
+        if not self.staged:
+            for batch, batch_checkpoint in self.extract(checkpoint):
+                yield self.transform(batch), batch_checkpoint
+            return
+        for actions, batch_checkpoint in self._staged_batches(checkpoint):
+            yield iter(actions), batch_checkpoint
+
+    def _staged_batches(self, checkpoint: AnyCheckpoint | None) -> Iterator[TransformedBatchT]:
+        """Extract and transform batches in background threads.
+
+        The next batches are fetched and transformed while the current one is being loaded. Queues are bounded, so
+        the stages wait for the loader once they are `extract_queue_size` / `transform_queue_size` batches ahead.
+        """
+        stop = threading.Event()
+        extracted: queue.Queue[Any] = queue.Queue(maxsize=self.extract_queue_size)
+        transformed: queue.Queue[Any] = queue.Queue(maxsize=self.transform_queue_size)
+        transformed_batches = (
+            (list(self.transform(batch)), batch_checkpoint)
+            for batch, batch_checkpoint in self._consume_stage(extracted, stop)
+        )
+        stages = [
+            threading.Thread(target=self._run_stage, args=(self.extract(checkpoint), extracted, stop), daemon=True),
+            threading.Thread(target=self._run_stage, args=(transformed_batches, transformed, stop), daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            yield from self._consume_stage(transformed, stop)
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
+
+    @staticmethod
+    def _run_stage(items: Iterable[Any], output: queue.Queue[Any], stop: threading.Event) -> None:
+        """Put items to the `output` queue until they are exhausted or the pipeline is stopped."""
+        result: Any = _STAGE_DONE
+        try:
+            for item in items:
+                if not ETLPipeline._put_stage_item(output, item, stop):
+                    return
+        except Exception as exc:  # noqa: BLE001
+            result = _StageError(exc)
+        finally:
+            if isinstance(items, Generator):
+                items.close()
+        ETLPipeline._put_stage_item(output, result, stop)
+
+    @staticmethod
+    def _put_stage_item(output: queue.Queue[Any], item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=_STAGE_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return True
+        return False
 
-    def update_timestamp_state(self) -> None:
-        timestamp = str(datetime.datetime.now(tz=datetime.UTC).timestamp()).rsplit(".", 1)[0]
-        self.storage.save(self.extractor.etl_timestamp_key, timestamp)
+    @staticmethod
+    def _consume_stage(source: queue.Queue[Any], stop: threading.Event) -> Iterator[Any]:
+        """Get items of the previous stage, re-raise its exception."""
+        while True:
+            try:
+                item = source.get(timeout=_STAGE_POLL_INTERVAL)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is _STAGE_DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.exc
+            yield item
 
-    def remove_ids_from_state(self) -> None:
-        self.storage.remove(self.extractor.etl_loaded_entities_ids_key)
+    def update_checkpoint_state(
+        self, checkpoint: AnyCheckpoint, key: str | None = None, state: BaseStorageBatch | None = None,
+    ) -> None:
+        (state or self.storage).save(key or self.extractor.checkpoint_key, checkpoint.serialize())
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .pipelines import ETLPipeline, RunReport
+
+# How often (seconds) the blocked `PipelineScheduler.run` wakes up, so it can be interrupted
+_STOP_POLL_INTERVAL: Final[float] = 1.0
+
+
+@dataclasses.dataclass
+class ScheduledPipeline:
+    """Pipeline run on its own cadence.
+
+    The pipeline is rerun right away while runs find changes: changes made during a run are synced by the next one.
+    Once a run finds nothing, the pipeline is rerun after `interval_seconds`; the interval grows `backoff_factor` times
+    with every idle (or failed) run, up to `max_interval_seconds`. Intervals are randomized by `jitter` (a fraction of
+    the interval), so replicas and pipelines don't hit the database at the same moments.
+    """
+
+    pipeline: ETLPipeline
+    interval_seconds: float = 30.0
+    max_interval_seconds: float = 300.0
+    backoff_factor: float = 2.0
+    jitter: float = 0.1
+
+    idle_runs: int = dataclasses.field(default=0, init=False)
+
+    def run(self) -> RunReport | None:
+        """Run the pipeline once, return its report (`None` if the run has failed)."""
+        try:
+            report = self.pipeline.execute()
+        except Exception:
+            logging.exception("Pipeline of the index `%s` failed", self.pipeline.loader.es_index_name)
+            self.idle_runs += 1
+            return None
+        self.idle_runs = 0 if report.batches else self.idle_runs + 1
+        return report
+
+    def get_delay(self) -> float:
+        """Get the delay (seconds) before the next run."""
+        if not self.idle_runs:
+            return 0.0
+        delay = min(self.interval_seconds * self.backoff_factor ** (self.idle_runs - 1), self.max_interval_seconds)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class PipelineScheduler:
+    """Runs every pipeline in a separate thread on its own cadence, so slow pipelines don't hold back fast ones.
+
+    Once stopped, the scheduler waits up to `stop_timeout_seconds` for current runs to finish. Threads of the pipelines
+    are daemons: runs that take longer are interrupted when the process exits and are resumed from their last
+    checkpoints on the next start.
+    """
+
+    def __init__(self, scheduled_pipelines: Sequence[ScheduledPipeline], stop_timeout_seconds: float = 60.0) -> None:
+        self._scheduled_pipelines = scheduled_pipelines
+        self._stop_timeout_seconds = stop_timeout_seconds
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def run(self) -> None:
+        """Run pipelines until the scheduler is stopped, then wait for their current runs to finish."""
+        self._threads = threads = [
+            threading.Thread(
+                target=self._run_pipeline,
+                args=(scheduled,),
+                name=f"etl-{scheduled.pipeline.loader.es_index_name}",
+                daemon=True,
+            )
+            for scheduled in self._scheduled_pipelines
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self._stop.wait(_STOP_POLL_INTERVAL):
+                pass
+        finally:
+            self.stop()
+            self.join()
+
+    def stop(self) -> None:
+        """Stop running pipelines once their current runs are finished, doesn't wait for them."""
+        self._stop.set()
+
+    def join(self) -> None:
+        """Wait up to `stop_timeout_seconds` for threads of the pipelines to finish their current runs."""
+        deadline = time.monotonic() + self._stop_timeout_seconds
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0.0))
+            if thread.is_alive():
+                logging.warning(
+                    "Run of `%s` hasn't finished in %.1fs, interrupt it", thread.name, self._stop_timeout_seconds,
+                )
+
+    def _run_pipeline(self, scheduled: ScheduledPipeline) -> None:
+        while not self._stop.is_set():
+            scheduled.run()
+            if delay := scheduled.get_delay():
+                logging.debug("Index `%s`: next run in %.1fs", scheduled.pipeline.loader.es_index_name, delay)
+                self._stop.wait(delay)
@@ -18,6 +18,27 @@ class BasePgSchema(ABC):
     def to_dict(self) -> dict[str, Any]:
         """Serialize object."""
 
+    @classmethod
+    def source_from_row(cls, data: dict) -> dict[str, Any]:
+        """Serialize input data without building intermediate objects.
+
+        Must return the same result as `from_dict(data).to_dict()`.
+        """
+        return cls.from_dict(data).to_dict()
+
+    @classmethod
+    def fragment_from_row(cls, data: dict, entity_type: str) -> dict[str, Any]:
+        """Serialize fields of the document `_source` that are built from entities of the `entity_type`.
+
+        Must return the same fields as `source_from_row`.
+        """
+        raise NotImplementedError(f"{cls.__name__} has no fragments built from `{entity_type}` entities")
+
+    @classmethod
+    def embedded_from_row(cls, data: dict, entity_type: str) -> dict[str, Any]:
+        """Serialize an entity of the `entity_type` the way it is embedded in the document `_source`."""
+        raise NotImplementedError(f"{cls.__name__} doesn't embed `{entity_type}` entities")
+
 
 @dataclasses.dataclass
 class PgSchema(BasePgSchema, ABC):
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import math
+from itertools import repeat
 from typing import TYPE_CHECKING, Any, ClassVar
 
+import orjson
+
+from etl.constants import DELETED_ENTITY_FIELD, EMBEDDED_ENTITY_FIELD, FRAGMENT_ENTITY_FIELD, RAW_ROW_FIELD
+from etl.infrastructure.db.elastic import dumps_bytes
+
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Iterator, Sequence
+    from concurrent.futures import Executor
+
+    from elasticsearch.serializer import Serializer
 
-    from .schemas import PgSchema
+    from .schemas import BasePgSchema, PgSchema
 
 
 class ElasticTransformer:
-    """Base class for all `data transformers` to the required format for Elasticsearch."""
+    """Base class for all `data transformers` to the required format for Elasticsearch.
+
+    With a process pool, batches of rows rendered as JSON text by Postgres (`RAW_ROW_FIELD`) are split between the
+    pool workers, which decode the rows and return serialized documents `_source`. A batch is split into a chunk per
+    worker, but chunks are not smaller than `min_chunk_size` rows: all `workers` are used by batches of at least
+    `workers * min_chunk_size` rows.
+    """
 
     etl_schema_class: ClassVar[type[PgSchema]]
 
@@ -17,22 +33,117 @@ class ElasticTransformer:
     es_index_name: ClassVar[str]
     es_type: ClassVar[str]
 
-    def transform(self, data: list[PgSchema]) -> Iterator[dict[str, Any]]:
-        """Transform data to the required format for Elasticsearch."""
+    # Column with the document `_source` rendered by Postgres
+    es_source_field: ClassVar[str] = "es_source"
+
+    # Min number of rows in a chunk sent to a pool worker, smaller chunks don't pay off the IPC
+    min_chunk_size: ClassVar[int] = 10
+
+    def __init__(
+        self, process_pool: Executor | None = None, serializer: Serializer | None = None, workers: int = 1,
+    ) -> None:
+        self._process_pool = process_pool
+        self._serializer = serializer
+        self._workers = workers
+
+    def transform(self, data: Sequence[dict]) -> Iterator[dict[str, Any]]:
+        """Transform data to the required format for Elasticsearch.
+
+        Rows of deleted entities are turned into `delete` actions, rows of document fragments into partial `update`
+        actions. Rows of embedded entities are turned into `update_by_query` actions, which are run by the loader.
+        """
+        changes = [row for row in data if not self._is_document_row(row)]
+        if changes:
+            data = [row for row in data if self._is_document_row(row)]
+            yield from self._prepare_changes(changes)
         actions = (
             {"_index": self.es_index_name, "_type": self.es_type, "_id": es_id, "_source": es_source}
             for es_id, es_source in self._prepare_values(data)
         )
         yield from actions
 
-    def _prepare_values(self, data: list[PgSchema]) -> Iterator[tuple[str, dict]]:
-        for entity in data:
-            yield self._prepare_es_id(entity), self._prepare_entity(entity)
-
     @staticmethod
-    def _prepare_entity(entity: PgSchema) -> dict:
-        return entity.to_dict()
+    def _is_document_row(row: dict) -> bool:
+        return DELETED_ENTITY_FIELD not in row and FRAGMENT_ENTITY_FIELD not in row and EMBEDDED_ENTITY_FIELD not in row
+
+    def _prepare_changes(self, rows: Sequence[dict]) -> Iterator[dict[str, Any]]:
+        for row in rows:
+            if EMBEDDED_ENTITY_FIELD in row:
+                entity_type = row[EMBEDDED_ENTITY_FIELD]
+                yield {
+                    "_op_type": "update_by_query",
+                    "_index": self.es_index_name,
+                    "entity_type": entity_type,
+                    "entity": self.etl_schema_class.embedded_from_row(row, entity_type),
+                    "documents_ids": [str(document_id) for document_id in row["documents_ids"]],
+                }
+                continue
+            action = {"_index": self.es_index_name, "_type": self.es_type, "_id": self._prepare_es_id(row)}
+            if row.get(DELETED_ENTITY_FIELD):
+                yield {**action, "_op_type": "delete"}
+                continue
+            fragment = self.etl_schema_class.fragment_from_row(row, row[FRAGMENT_ENTITY_FIELD])
+            yield {**action, "_op_type": "update", "doc": fragment}
+
+    def _prepare_values(self, data: Sequence[dict]) -> Iterator[tuple[str, dict | str | bytes]]:
+        if (
+            self._process_pool is not None
+            and self._serializer is not None
+            and len(data) >= 2 * self.min_chunk_size
+            and RAW_ROW_FIELD in data[0]
+        ):
+            yield from self._prepare_values_in_pool(data, self._process_pool, self._serializer)
+            return
+        prepare_entity = self._prepare_entity
+        for row in data:
+            yield self._prepare_es_id(row), prepare_entity(row)
+
+    def _prepare_values_in_pool(
+        self, data: Sequence[dict], process_pool: Executor, serializer: Serializer,
+    ) -> Iterator[tuple[str, bytes]]:
+        """Build and serialize documents in the pool workers.
+
+        Rows are sent to workers as the JSON text rendered by Postgres, so the ETL process neither decodes nor encodes
+        them, and documents come back serialized to bytes, which are passed to the bulk requests as is. The order of
+        documents is preserved. Documents don't change: the types that don't survive the JSON round-trip are serialized
+        as strings anyway.
+        """
+        chunk_size = max(math.ceil(len(data) / self._workers), self.min_chunk_size)
+        chunks = [
+            [row[RAW_ROW_FIELD] for row in data[start:start + chunk_size]] for start in range(0, len(data), chunk_size)
+        ]
+        for values in process_pool.map(
+            prepare_serialized_values, repeat(self.etl_schema_class), repeat(self.es_source_field), repeat(serializer),
+            chunks,
+        ):
+            yield from values
+
+    def _prepare_entity(self, row: dict) -> dict | str:
+        """Build document `_source` straight from the Postgres row.
+
+        JSON rendered by Postgres is passed as is: the Elasticsearch serializer doesn't serialize strings. Rows rendered
+        as JSON text for the pool workers are decoded first.
+        """
+        es_source: str | None = row.get(self.es_source_field)
+        if es_source is not None:
+            return es_source
+        raw_row: str | None = row.get(RAW_ROW_FIELD)
+        if raw_row is not None:
+            row = orjson.loads(raw_row)
+        return self.etl_schema_class.source_from_row(row)
 
     @staticmethod
-    def _prepare_es_id(entity: PgSchema) -> str:
-        return str(entity.id)
+    def _prepare_es_id(row: dict) -> str:
+        return str(row["id"])
+
+
+def prepare_serialized_values(
+    schema_class: type[BasePgSchema], es_source_field: str, serializer: Serializer, raw_rows: Sequence[str],
+) -> list[tuple[str, bytes]]:
+    """Build `(_id, serialized _source)` of documents from rows rendered as JSON, is run in process pool workers."""
+    values = []
+    for row in map(orjson.loads, raw_rows):
+        es_source: str | None = row.get(es_source_field)
+        source = schema_class.source_from_row(row) if es_source is None else es_source
+        values.append((str(row["id"]), dumps_bytes(serializer, source)))
+    return values
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from etl.infrastructure.db.postgres import PostgresListener
+
+# How often (seconds) the blocked `ChangeWatcher.wait` wakes up, so it can be interrupted
+_STOP_POLL_INTERVAL: Final[float] = 1.0
+
+
+class ChangeWatcher:
+    """Waits for changes of source tables announced with Postgres notifications.
+
+    Notifications are sent by triggers on the source tables (see `sql/change_notifications.sql`) to the channels named
+    after the tables. Bursts of notifications are collected for `debounce_seconds`, so a series of changes is synced
+    in a single run. If nothing is announced for `poll_interval_seconds`, all tables are polled anyway.
+    Once the watcher is stopped, waiting is interrupted.
+    """
+
+    def __init__(self, listener: PostgresListener, debounce_seconds: float, poll_interval_seconds: float) -> None:
+        self._listener = listener
+        self._debounce_seconds = debounce_seconds
+        self._poll_interval_seconds = poll_interval_seconds
+        self._stop = threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def stop(self) -> None:
+        """Stop watching, is safe to call from signal handlers."""
+        self._stop.set()
+
+    def watch(self, tables: Iterable[str]) -> None:
+        """Start watching the given tables."""
+        self._listener.listen(tables)
+
+    def wait(self) -> set[str] | None:
+        """Block until source tables change.
+
+        Return the changed tables, or `None` if the poll interval has elapsed and all tables should be polled (or the
+        watcher has been stopped).
+        """
+        poll_at = time.monotonic() + self._poll_interval_seconds
+        changed: set[str] = set()
+        while not changed and not self._stop.is_set() and (remaining := poll_at - time.monotonic()) > 0:
+            changed = self._listener.wait(min(remaining, _STOP_POLL_INTERVAL))
+        if not changed:
+            if not self._stop.is_set():
+                logging.debug("No changes announced in %.1fs, polling all tables", self._poll_interval_seconds)
+            return None
+        burst_end = time.monotonic() + self._debounce_seconds
+        while (remaining := burst_end - time.monotonic()) > 0:
+            changed |= self._listener.wait(remaining)
+        logging.debug("Changed tables: %s", ", ".join(sorted(changed)))
+        return changed
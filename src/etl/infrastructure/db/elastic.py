@@ -1,10 +1,64 @@
-from collections.abc import Iterator
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
 
 import elasticsearch
+import orjson
+from elasticsearch import AsyncElasticsearch
 from elasticsearch.connection.http_requests import RequestsHttpConnection
+from elasticsearch.exceptions import SerializationError
+from elasticsearch.serializer import JSONSerializer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from elasticsearch.serializer import Serializer
+
+
+class OrjsonSerializer(JSONSerializer):
+    """JSON serializer backed by `orjson`.
+
+    UUID and date/datetime values are encoded natively,
+    other types (e.g. Decimal) fall back to `JSONSerializer.default`.
+    Output is the same compact JSON as the one of the default serializer.
+    """
+
+    def dumps(self, data: Any) -> str:
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+        return self.dumps_bytes(data).decode()
+
+    def dumps_bytes(self, data: Any) -> bytes:
+        """Serialize data to UTF-8 encoded JSON, skipping the round-trip through `str`."""
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, str):
+            return data.encode()
+        try:
+            return orjson.dumps(data, default=self.default)
+        except TypeError as exc:
+            raise SerializationError(data, exc) from exc
+
+    def loads(self, s: str | bytes) -> Any:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as exc:
+            raise SerializationError(s, exc) from exc
+
+
+def dumps_bytes(serializer: Serializer, data: Any) -> bytes:
+    """Serialize data to UTF-8 encoded JSON with the given serializer, serialized data is passed as is."""
+    if isinstance(serializer, OrjsonSerializer):
+        return serializer.dumps_bytes(data)
+    if isinstance(data, bytes):
+        return data
+    return serializer.dumps(data).encode()
 
 
-def init_elastic(host: str, port: int, retry_on_timeout: bool = True) -> Iterator[elasticsearch.Elasticsearch]:
+def init_elastic(
+    host: str, port: int, retry_on_timeout: bool = True, serializer: Serializer | None = None,
+) -> Iterator[elasticsearch.Elasticsearch]:
     """Setup Elasticsearch client."""
     elastic_client = elasticsearch.Elasticsearch(
         hosts=[
@@ -14,6 +68,25 @@ def init_elastic(host: str, port: int, retry_on_timeout: bool = True) -> Iterato
         max_retries=30,
         retry_on_timeout=retry_on_timeout,
         request_timeout=30,
+        serializer=serializer or JSONSerializer(),
     )
     yield elastic_client
     elastic_client.close()
+
+
+def create_async_elastic(
+    host: str, port: int, retry_on_timeout: bool = True, serializer: Serializer | None = None,
+) -> AsyncElasticsearch:
+    """Create async Elasticsearch client.
+
+    HTTP session is opened on the first request, so the client is bound to the event loop it is used in.
+    """
+    return AsyncElasticsearch(
+        hosts=[
+            {"host": host, "port": port},
+        ],
+        max_retries=30,
+        retry_on_timeout=retry_on_timeout,
+        request_timeout=30,
+        serializer=serializer or JSONSerializer(),
+    )
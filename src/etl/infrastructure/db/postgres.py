@@ -1,29 +1,208 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import contextlib
+import logging
+import select
+from typing import TYPE_CHECKING, Any
 
+import backoff
+import psycopg
 import psycopg2
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Iterable, Iterator
 
     from psycopg2.extensions import connection
 
 
-def init_postgres(db_name: str, db_user: str, db_password: str, host: str, port: int) -> Iterator[connection]:
-    """Setup PostgreSQL client."""
-    postgres_dsl = {
-        "dbname": db_name,
-        "user": db_user,
-        "password": db_password,
-        "host": host,
-        "port": port,
-    }
-    postgres_connection = psycopg2.connect(**postgres_dsl, cursor_factory=RealDictCursor)  # type: ignore[call-overload]
+class PostgresPool:
+    """Pool of Postgres connections shared by ETL pipelines.
+
+    Every pipeline run (or worker) checks out its own connection, so pipelines don't queue behind each other's
+    queries on a single connection.
+    """
+
+    def __init__(self, min_connections: int, max_connections: int, reconnect_max_time: float, **dsl: Any) -> None:
+        self._pool = ThreadedConnectionPool(min_connections, max_connections, cursor_factory=RealDictCursor, **dsl)
+        self._reconnect_max_time = reconnect_max_time
+
+    @contextlib.contextmanager
+    def checkout(self) -> Iterator[connection]:
+        """Check out a healthy connection.
+
+        The transaction is rolled back when the connection is returned, broken connections are discarded.
+        """
+        pg_conn = self._get_connection()
+        try:
+            yield pg_conn
+        finally:
+            self._release(pg_conn)
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+    def _get_connection(self) -> connection:
+        """Get a healthy connection, retry while Postgres is unavailable."""
+        get_connection = backoff.on_exception(
+            backoff.expo, psycopg2.OperationalError, max_time=self._reconnect_max_time, logger=logging.getLogger(),
+        )(self._get_healthy_connection)
+        return get_connection()
+
+    def _get_healthy_connection(self) -> connection:
+        pg_conn: connection = self._pool.getconn()
+        if not self._is_healthy(pg_conn):
+            logging.warning("Postgres connection is broken, reconnecting")
+            self._pool.putconn(pg_conn, close=True)
+            return self._pool.getconn()
+        return pg_conn
+
+    def _release(self, pg_conn: connection) -> None:
+        close = bool(pg_conn.closed)
+        if not close:
+            try:
+                pg_conn.rollback()
+            except psycopg2.Error:
+                close = True
+        self._pool.putconn(pg_conn, close=close)
+
+    @staticmethod
+    def _is_healthy(pg_conn: connection) -> bool:
+        if pg_conn.closed:
+            return False
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pg_conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+
+class PostgresListener:
+    """Listener of Postgres notifications (`LISTEN/NOTIFY`).
+
+    While listening, a dedicated connection is checked out from the pool and switched to the autocommit mode.
+    """
+
+    def __init__(self, pg_pool: PostgresPool) -> None:
+        self._pg_pool = pg_pool
+        self._channels: tuple[str, ...] = ()
+        self._pg_conn: connection | None = None
+        self._exit_stack = contextlib.ExitStack()
+
+    def listen(self, channels: Iterable[str]) -> None:
+        """Subscribe to the given channels."""
+        self.close()
+        self._channels = tuple(dict.fromkeys(channels))
+        self._connect()
+
+    def wait(self, timeout: float) -> set[str]:
+        """Wait up to `timeout` seconds for notifications, return channels they have been sent to.
+
+        Notifications might have been missed if the connection is lost: once reconnected, all channels are returned.
+        """
+        if self._pg_conn is None:
+            raise RuntimeError("Listener is not subscribed to any channels")
+        try:
+            return self._receive(self._pg_conn, timeout)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            logging.warning("Postgres listener connection is lost, reconnecting", exc_info=True)
+            self.close()
+            self._connect()
+            return set(self._channels)
+
+    def close(self) -> None:
+        """Unsubscribe from all channels and return the connection to the pool."""
+        pg_conn, self._pg_conn = self._pg_conn, None
+        if pg_conn is None:
+            return
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute("UNLISTEN *")
+            pg_conn.autocommit = False
+        except psycopg2.Error:
+            pg_conn.close()
+        self._exit_stack.close()
+
+    def _connect(self) -> None:
+        pg_conn = self._exit_stack.enter_context(self._pg_pool.checkout())
+        pg_conn.autocommit = True
+        self._pg_conn = pg_conn
+        with pg_conn.cursor() as cursor:
+            for channel in self._channels:
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+
+    @staticmethod
+    def _receive(pg_conn: connection, timeout: float) -> set[str]:
+        if not pg_conn.notifies and select.select([pg_conn], [], [], timeout) == ([], [], []):
+            return set()
+        pg_conn.poll()
+        channels = {notify.channel for notify in pg_conn.notifies}
+        pg_conn.notifies.clear()
+        return channels
+
+
+def init_postgres_pool(
+    db_name: str,
+    db_user: str,
+    db_password: str,
+    host: str,
+    port: int,
+    min_connections: int = 1,
+    max_connections: int = 10,
+    reconnect_max_time: float = 60.0,
+) -> Iterator[PostgresPool]:
+    """Setup pool of PostgreSQL connections."""
+    postgres_pool = PostgresPool(
+        min_connections,
+        max_connections,
+        reconnect_max_time,
+        dbname=db_name,
+        user=db_user,
+        password=db_password,
+        host=host,
+        port=port,
+    )
     register_postgres_extensions()
-    yield postgres_connection
-    postgres_connection.close()
+    yield postgres_pool
+    postgres_pool.close()
+
+
+def init_postgres_listener(pg_pool: PostgresPool) -> Iterator[PostgresListener]:
+    """Setup listener of Postgres notifications."""
+    listener = PostgresListener(pg_pool)
+    yield listener
+    listener.close()
+
+
+def create_async_postgres_pool(
+    db_name: str,
+    db_user: str,
+    db_password: str,
+    host: str,
+    port: int,
+    min_connections: int = 1,
+    max_connections: int = 10,
+    reconnect_max_time: float = 60.0,
+) -> AsyncConnectionPool:
+    """Create pool of async PostgreSQL connections.
+
+    The pool is created closed and must be opened in the event loop it is used in.
+    """
+    conninfo = psycopg.conninfo.make_conninfo(dbname=db_name, user=db_user, password=db_password, host=host, port=port)
+    return AsyncConnectionPool(
+        conninfo,
+        kwargs={"row_factory": dict_row},
+        min_size=min_connections,
+        max_size=max_connections,
+        reconnect_timeout=reconnect_max_time,
+        open=False,
+    )
 
 
 def register_postgres_extensions() -> None:
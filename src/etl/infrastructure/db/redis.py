@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Literal
 
 import redis
+import redis.asyncio
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -13,3 +14,10 @@ def init_redis(host: str, port: int, decode_responses: Literal[True] | Literal[F
     redis_client = redis.Redis(host=host, port=port, decode_responses=decode_responses)
     yield redis_client
     redis_client.close()
+
+
+def create_async_redis(
+    host: str, port: int, decode_responses: Literal[True] | Literal[False] = True,
+) -> redis.asyncio.Redis:
+    """Create async Redis client."""
+    return redis.asyncio.Redis(host=host, port=port, decode_responses=decode_responses)
@@ -1,15 +1,102 @@
 from __future__ import annotations
 
 import abc
-from typing import TYPE_CHECKING, Any, TypeAlias
+from typing import TYPE_CHECKING, Any, TypeAlias, cast
+
+from redis.exceptions import WatchError
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Mapping
 
     from redis import Redis
+    from redis.asyncio import Redis as AsyncRedis
+    from redis.asyncio.client import Pipeline as AsyncPipeline
+    from redis.client import Pipeline
 
     StorageItemT: TypeAlias = str | None
     StorageItemListT: TypeAlias = Iterable[str] | None
+    StorageMapValuesT: TypeAlias = list[str | None]
+
+# Take a lease and issue the next fencing token of the lease key
+_ACQUIRE_LEASE_SCRIPT = """
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return redis.call("INCR", KEYS[2])
+end
+return 0
+"""
+
+# Prolong / delete a lease only if it is still held by the given owner
+_RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class FencingError(Exception):
+    """Batch has been rejected: a newer lease has been taken since the batch was fenced."""
+
+
+def get_fencing_token_key(key: str) -> str:
+    """Get key of the last fencing token issued for the lease key."""
+    return f"{key}:fencing_token"
+
+
+class BaseStorageBatch:
+    """Base batch of state storage writes.
+
+    Writes are queued and sent to the storage at once, they are applied atomically.
+    """
+
+    @abc.abstractmethod
+    def save(self, key: str, value: Any) -> None:
+        """Queue saving item in storage."""
+
+    @abc.abstractmethod
+    def save_list(self, key: str, *values: Any) -> None:
+        """Queue saving list of items in storage."""
+
+    @abc.abstractmethod
+    def save_map(self, key: str, mapping: Mapping[str, Any]) -> None:
+        """Queue saving fields of a mapping in storage."""
+
+    @abc.abstractmethod
+    def remove_map_values(self, key: str, *fields: str) -> None:
+        """Queue deleting the given mapping fields from storage."""
+
+    @abc.abstractmethod
+    def remove(self, key: str) -> None:
+        """Queue deleting item from storage."""
+
+
+class StorageBatch(BaseStorageBatch):
+    """Batch of state storage writes."""
+
+    @abc.abstractmethod
+    def fence(self, key: str, token: int) -> None:
+        """Apply the batch only if `token` is the last fencing token of the lease on the key."""
+
+    @abc.abstractmethod
+    def execute(self) -> None:
+        """Apply queued writes in a single round-trip.
+
+        `FencingError` is raised if the batch is fenced by a stale token.
+        """
+
+
+class AsyncStorageBatch(BaseStorageBatch):
+    """Batch of async state storage writes."""
+
+    @abc.abstractmethod
+    async def execute(self) -> None:
+        """Apply queued writes in a single round-trip."""
 
 
 class BaseStorage:
@@ -31,16 +118,118 @@ class BaseStorage:
     def retrieve_list(self, key: str) -> StorageItemListT:
         """Retrieve list of items from storage."""
 
+    @abc.abstractmethod
+    def save_map(self, key: str, mapping: Mapping[str, Any]) -> int:
+        """Save fields of a mapping in storage."""
+
+    @abc.abstractmethod
+    def retrieve_map_values(self, key: str, *fields: str) -> StorageMapValuesT:
+        """Retrieve values of the given mapping fields from storage."""
+
+    @abc.abstractmethod
+    def remove_map_values(self, key: str, *fields: str) -> int:
+        """Delete the given mapping fields from storage."""
+
+    @abc.abstractmethod
+    def increment_map_value(self, key: str, field: str, amount: int = 1) -> int:
+        """Increment an integer mapping field in storage, return the new value."""
+
     @abc.abstractmethod
     def remove(self, key: str) -> int:
         """Delete item from storage."""
 
+    @abc.abstractmethod
+    def acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> int:
+        """Take a lease on the key for `ttl_seconds` unless it is held by someone.
+
+        Return the fencing token of the lease (`0` if the lease is held by someone): tokens of the key grow with every
+        lease taken.
+        """
+
+    @abc.abstractmethod
+    def renew_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Prolong a lease held by the `owner` for another `ttl_seconds`, return `False` if the lease is lost."""
+
+    @abc.abstractmethod
+    def release_lease(self, key: str, owner: str) -> bool:
+        """Release a lease held by the `owner`."""
+
+    @abc.abstractmethod
+    def batch(self) -> StorageBatch:
+        """Start a batch of writes."""
+
+
+class _RedisBatchCommands(BaseStorageBatch):
+
+    def __init__(self, pipeline: Pipeline | AsyncPipeline):
+        self.pipeline = pipeline
+
+    def save(self, key: str, value: Any) -> None:
+        self.pipeline.set(key, value)
+
+    def save_list(self, key: str, *values: Any) -> None:
+        self.pipeline.sadd(key, *values)
+
+    def save_map(self, key: str, mapping: Mapping[str, Any]) -> None:
+        self.pipeline.hset(key, mapping=mapping)  # type: ignore[arg-type]
+
+    def remove_map_values(self, key: str, *fields: str) -> None:
+        self.pipeline.hdel(key, *fields)
+
+    def remove(self, key: str, /) -> None:
+        self.pipeline.delete(key)
+
+
+class RedisStorageBatch(_RedisBatchCommands, StorageBatch):
+    """Batch of writes sent to Redis as a transaction (`MULTI` / `EXEC`).
+
+    A fenced batch watches the fencing token of the lease (`WATCH`), so it is not applied if a newer lease is taken
+    before the transaction is committed.
+    """
+
+    pipeline: Pipeline
+
+    def __init__(self, pipeline: Pipeline):
+        super().__init__(pipeline)
+        self._fence: tuple[str, int] | None = None
+
+    def fence(self, key: str, token: int) -> None:
+        self._fence = (key, token)
+
+    def execute(self) -> None:
+        if self._fence is None:
+            self.pipeline.execute()
+            return
+        key, token = self._fence
+        token_key = get_fencing_token_key(key)
+        try:
+            self.pipeline.watch(token_key)
+            if int(cast("str | None", self.pipeline.get(token_key)) or 0) != token:
+                raise FencingError(f"Fencing token {token} of the lease `{key}` is stale")
+            self.pipeline.execute()
+        except WatchError as exc:
+            raise FencingError(f"Fencing token {token} of the lease `{key}` is stale") from exc
+        finally:
+            self.pipeline.reset()
+
+
+class AsyncRedisStorageBatch(_RedisBatchCommands, AsyncStorageBatch):
+    """Batch of writes sent to Redis as a transaction (`MULTI` / `EXEC`)."""
+
+    pipeline: AsyncPipeline
+
+    async def execute(self) -> None:
+        await self.pipeline.execute()
+
 
 class RedisStorage(BaseStorage):
     """Storage with Redis backend."""
 
     def __init__(self, redis_client: Redis):
         self.redis_client = redis_client
+        self._acquire_lease = redis_client.register_script(_ACQUIRE_LEASE_SCRIPT)
+        self._renew_lease = redis_client.register_script(_RENEW_LEASE_SCRIPT)
+        self._release_lease = redis_client.register_script(_RELEASE_LEASE_SCRIPT)
 
     def save(self, key: str, value: Any) -> bool | None:
         return self.redis_client.set(key, value)
@@ -54,5 +243,83 @@ class RedisStorage(BaseStorage):
     def retrieve_list(self, key: str, /) -> StorageItemListT:
         return self.redis_client.smembers(key)
 
+    def save_map(self, key: str, mapping: Mapping[str, Any]) -> int:
+        return self.redis_client.hset(key, mapping=mapping)  # type: ignore[arg-type]
+
+    def retrieve_map_values(self, key: str, *fields: str) -> StorageMapValuesT:
+        return self.redis_client.hmget(key, fields)
+
+    def remove_map_values(self, key: str, *fields: str) -> int:
+        return self.redis_client.hdel(key, *fields)
+
+    def increment_map_value(self, key: str, field: str, amount: int = 1) -> int:
+        return self.redis_client.hincrby(key, field, amount)
+
     def remove(self, key: str, /) -> int:
         return self.redis_client.delete(key)
+
+    def acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> int:
+        keys = [key, get_fencing_token_key(key)]
+        return int(self._acquire_lease(keys=keys, args=[owner, int(ttl_seconds * 1000)]))
+
+    def renew_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        return bool(self._renew_lease(keys=[key], args=[owner, int(ttl_seconds * 1000)]))
+
+    def release_lease(self, key: str, owner: str) -> bool:
+        return bool(self._release_lease(keys=[key], args=[owner]))
+
+    def batch(self) -> RedisStorageBatch:
+        return RedisStorageBatch(self.redis_client.pipeline(transaction=True))
+
+
+class AsyncBaseStorage:
+    """Base async state storage."""
+
+    @abc.abstractmethod
+    async def save(self, key: str, value: Any) -> bool | None:
+        """Save item in storage."""
+
+    @abc.abstractmethod
+    async def retrieve(self, key: str) -> StorageItemT:
+        """Retrieve item from storage."""
+
+    @abc.abstractmethod
+    async def save_map(self, key: str, mapping: Mapping[str, Any]) -> int:
+        """Save fields of a mapping in storage."""
+
+    @abc.abstractmethod
+    async def retrieve_map_values(self, key: str, *fields: str) -> StorageMapValuesT:
+        """Retrieve values of the given mapping fields from storage."""
+
+    @abc.abstractmethod
+    async def remove(self, key: str) -> int:
+        """Delete item from storage."""
+
+    @abc.abstractmethod
+    def batch(self) -> AsyncStorageBatch:
+        """Start a batch of writes."""
+
+
+class AsyncRedisStorage(AsyncBaseStorage):
+    """Async storage with Redis backend."""
+
+    def __init__(self, redis_client: AsyncRedis):
+        self.redis_client = redis_client
+
+    async def save(self, key: str, value: Any) -> bool | None:
+        return await self.redis_client.set(key, value)
+
+    async def retrieve(self, key: str, /) -> StorageItemT:
+        return await self.redis_client.get(key)
+
+    async def save_map(self, key: str, mapping: Mapping[str, Any]) -> int:
+        return await self.redis_client.hset(key, mapping=mapping)  # type: ignore[arg-type]
+
+    async def retrieve_map_values(self, key: str, *fields: str) -> StorageMapValuesT:
+        return await self.redis_client.hmget(key, fields)
+
+    async def remove(self, key: str, /) -> int:
+        return await self.redis_client.delete(key)
+
+    def batch(self) -> AsyncRedisStorageBatch:
+        return AsyncRedisStorageBatch(self.redis_client.pipeline(transaction=True))
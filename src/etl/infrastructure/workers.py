@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def init_process_pool(workers: int) -> Iterator[ProcessPoolExecutor | None]:
+    """Setup pool of worker processes for CPU-bound work.
+
+    No pool is created if `workers` is zero. Workers are started by a fork server, so they don't inherit threads of
+    the ETL process.
+    """
+    if not workers:
+        yield None
+        return
+    process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+    yield process_pool
+    process_pool.shutdown(cancel_futures=True)